@@ -13,12 +13,6 @@ from argparse import ArgumentParser
 from importlib.metadata import version
 
 from geopull.directories import DataDir
-from geopull.extractor import GeopullExtractor
-from geopull.geofile import DaylightFile, PBFFile
-from geopull.normalizer import GeopullNormalizer
-from geopull.orchestrator import Orchestrator
-
-logging.basicConfig(level=logging.INFO)
 
 
 class GeoPullCLI:
@@ -78,9 +72,15 @@ class GeoPullCLI:
     def main(self) -> None:
         """
         Main method for the geopull package CLI.
+
+        The subcommand modules pull in geopandas, so they are only imported
+        once the subcommand that needs them is known.
         """
+        # pylint: disable=import-outside-toplevel
         if self.args.subcommand == "download":
             if self.args.filetype == "countries":
+                from geopull.orchestrator import Orchestrator
+
                 orch = Orchestrator(self.args.country_list)
                 try:
                     orch.download()
@@ -91,28 +91,35 @@ class GeoPullCLI:
                 except NotADirectoryError as e:
                     self.parser.error(str(e))
             elif self.args.filetype == "daylight":
+                from geopull.geofile import DaylightFile
+
                 dl = DaylightFile(datadir=DataDir(self.args.output_dir))
                 dl.download(self.args.overwrite)
         elif self.args.subcommand == "export":
-            for country in self.args.country_list:
-                try:
-                    pbf_file = PBFFile(
-                        country_code=country.upper(),
-                        datadir=DataDir(self.args.output_dir),
-                    )
-                    pbf_file.export(
-                        self.args.attributes,
-                        self.args.include_tags,
-                        self.args.geometry_type,
-                        self.args.overwrite,
-                    )
-                except KeyError as e:
-                    self.parser.error(str(e))
-                except FileNotFoundError as e:
-                    self.parser.error(str(e))
-                except NotADirectoryError as e:
-                    self.parser.error(str(e))
+            from geopull.orchestrator import Orchestrator
+
+            try:
+                orch = Orchestrator(
+                    self.args.country_list,
+                    datadir=DataDir(self.args.output_dir),
+                )
+                orch.export(
+                    attributes=self.args.attributes,
+                    include_tags=self.args.include_tags,
+                    geometry_type=self.args.geometry_type,
+                    overwrite=self.args.overwrite,
+                    stream=self.args.stream,
+                )
+            except KeyError as e:
+                self.parser.error(str(e))
+            except FileNotFoundError as e:
+                self.parser.error(str(e))
+            except NotADirectoryError as e:
+                self.parser.error(str(e))
         elif self.args.subcommand == "extract":
+            from geopull.extractor import GeopullExtractor
+            from geopull.orchestrator import Orchestrator
+
             extractor = GeopullExtractor(
                 datadir=DataDir(self.args.output_dir),
                 overwrite=self.args.overwrite,
@@ -129,6 +136,9 @@ class GeoPullCLI:
                 self.parser.error(str(e))
 
         elif self.args.subcommand == "normalize":
+            from geopull.normalizer import GeopullNormalizer
+            from geopull.orchestrator import Orchestrator
+
             normalizer = GeopullNormalizer(
                 datadir=DataDir(self.args.output_dir)
             )
@@ -136,6 +146,8 @@ class GeoPullCLI:
             orch.normalize(normalizer=normalizer)
 
         elif self.args.subcommand == "block":
+            from geopull.orchestrator import Orchestrator
+
             orch = Orchestrator(self.args.country_list)
             orch.block()
 
@@ -198,6 +210,15 @@ class GeoPullCLI:
             default=None,
             help="Geometry type to export",
         )
+        self.export_parser.add_argument(
+            "--stream",
+            action="store_true",
+            help=(
+                "Stream the features into GeoParquet files with pyosmium "
+                "instead of exporting GeoJSON files with osmium-tool."
+            ),
+            default=False,
+        )
         self._add_country_args(self.export_parser)
         self._add_io_args(self.export_parser)
 
@@ -237,7 +258,11 @@ class GeoPullCLI:
 def main() -> None:
     """
     Main driver method for the geopull package CLI.
+
+    The INFO logging of the CLI is only configured here, so importing the
+    package does not install handlers on the root logger.
     """
+    logging.basicConfig(level=logging.INFO)
     cli = GeoPullCLI()
     cli.main()
 
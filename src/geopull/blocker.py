@@ -12,19 +12,174 @@ Usage:
 """
 
 import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Optional
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-import pygeohash as pgh
 import shapely
 from geopandas import GeoDataFrame
-from shapely import MultiLineString, MultiPolygon
+from shapely import MultiLineString, MultiPolygon, Polygon
 
 from geopull.geofile import ParquetFeatureFile
+from geopull.geometry import mercator_area
 
 logger = logging.getLogger(__name__)
 
+_GEOHASH_BASE32 = np.frombuffer(
+    b"0123456789bcdefghjkmnpqrstuvwxyz", dtype=np.uint8
+)
+
+
+def _quantize(coords: np.ndarray, bits: int, limit: float) -> np.ndarray:
+    """Finds the cell of each coordinate on a regular grid of 2**bits cells.
+
+    The cell index is estimated with floating point arithmetic and then
+    checked against the exact cell boundaries, which are the same dyadic
+    midpoints a geohash bisection visits, so the index always matches the
+    bisection.
+
+    Args:
+        coords (np.ndarray): the coordinates, within [-limit, limit].
+        bits (int): the number of bits of the cell index.
+        limit (float): the half width of the coordinate range.
+
+    Returns:
+        np.ndarray: the cell index of each coordinate as uint64.
+    """
+    cells = 1 << bits
+
+    def lower_bound(index: np.ndarray) -> np.ndarray:
+        return (index - cells // 2) * (2 * limit) / cells
+
+    index = np.floor((coords + limit) * (cells / (2 * limit)))
+    index = index.astype(np.int64)
+    index -= coords < lower_bound(index)
+    index += coords >= lower_bound(index + 1)
+    return np.clip(index, 0, cells - 1).astype(np.uint64)
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Spreads the lower 32 bits of each value onto the even bit positions.
+
+    Args:
+        values (np.ndarray): the uint64 values to spread.
+
+    Returns:
+        np.ndarray: the spread values.
+    """
+    values = values & np.uint64(0x00000000FFFFFFFF)
+    for shift, mask in (
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def _encode_geohash(
+    lats: np.ndarray, lons: np.ndarray, precision: int
+) -> np.ndarray:
+    """Encodes arrays of coordinates into geohashes.
+
+    A geohash of precision p is a 5p bit integer whose bits alternate
+    between the longitude and latitude cells, starting with the longitude.
+    Both cells are computed for the whole array at once, interleaved into a
+    single uint64 with bit spreading masks, and split into 5 bit base32
+    characters. The output is identical to the reference bisection encoder.
+
+    Args:
+        lats (np.ndarray): the latitudes of the points.
+        lons (np.ndarray): the longitudes of the points.
+        precision (int): the number of characters of the geohash, at most
+            12.
+
+    Returns:
+        np.ndarray: the geohashes as an array of strings.
+
+    Raises:
+        ValueError: if the precision is not between 1 and 12, since longer
+            geohashes do not fit in a uint64.
+    """
+    if not 1 <= precision <= 12:
+        raise ValueError(
+            f"geohash precision must be between 1 and 12, got {precision}"
+        )
+    nbits = 5 * precision
+    lon_cells = _quantize(lons, bits=(nbits + 1) // 2, limit=180.0)
+    lat_cells = _quantize(lats, bits=nbits // 2, limit=90.0)
+
+    # the last bit belongs to the longitude when the bit count is odd
+    odd = nbits % 2
+    codes = (_spread_bits(lon_cells) << np.uint64(1 - odd)) | (
+        _spread_bits(lat_cells) << np.uint64(odd)
+    )
+
+    shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+    groups = (codes[:, np.newaxis] >> shifts) & np.uint64(31)
+    chars = _GEOHASH_BASE32[groups]
+    return chars.view(f"S{precision}").ravel().astype(str)
+
+
+def load_country_features(
+    country_code: str,
+) -> tuple[GeoDataFrame, GeoDataFrame]:
+    """Loads the normalized land and line features of a country.
+
+    The result is cached so that building several blockers for the same
+    country, e.g. to try different geohash precisions, only reads the
+    parquet files once. The cache is keyed on the modification times of the
+    files, so a country normalized again is read again. The returned frames
+    are shared between calls and must not be modified in place.
+
+    Args:
+        country_code (str): the ISO3 country code.
+
+    Returns:
+        tuple[GeoDataFrame, GeoDataFrame]: the land and line features.
+    """
+    files = [
+        ParquetFeatureFile(country_code=country_code, features=features)
+        for features in ("admin", "linestring")
+    ]
+    mtimes = tuple(file.local_path.stat().st_mtime_ns for file in files)
+    return _read_country_features(country_code, mtimes)
+
+
+@lru_cache(maxsize=2)
+def _read_country_features(
+    country_code: str, mtimes: tuple[int, ...]
+) -> tuple[GeoDataFrame, GeoDataFrame]:
+    """Reads the normalized land and line features of a country.
+
+    The cache is kept small since a single country can take several
+    gigabytes of memory.
+
+    Args:
+        country_code (str): the ISO3 country code.
+        mtimes (tuple[int, ...]): the modification times of the files, only
+            used as part of the cache key.
+
+    Returns:
+        tuple[GeoDataFrame, GeoDataFrame]: the land and line features.
+    """
+    land_parq = ParquetFeatureFile(country_code=country_code, features="admin")
+    line_parq = ParquetFeatureFile(
+        country_code=country_code, features="linestring"
+    )
+    # the blocker only uses these columns, so the rest is never decoded
+    return (
+        land_parq.read_file(columns=["geometry"]),
+        line_parq.read_file(columns=["geometry", "highway"]),
+    )
+
 
 @dataclass
 class Blocker:
@@ -42,6 +197,7 @@ class Blocker:
     region_code: str
     land_df: GeoDataFrame
     line_df: GeoDataFrame
+    _land_area: float = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         land_df = self.land_df
@@ -52,33 +208,167 @@ class Blocker:
         if line_df.crs != 4326:
             line_df = line_df.set_crs(4326, allow_override=True)
 
-        land_df = land_df.explode(index_parts=False)
-        land_df = land_df[land_df["geometry"].geom_type == "Polygon"]
-        land_df = land_df[["code", "geometry"]]
+        land_df = self._polygon_parts(land_df[["code", "geometry"]])
         line_df = line_df[["geometry", "highway"]]
 
         self.land_df = land_df
         self.line_df = line_df
+        self._land_area = mercator_area(land_df.geometry.values).sum()
+
+    @cached_property
+    def _land_enclosure(self) -> MultiLineString:
+        """The exterior rings of the land polygons."""
+        return self._get_land_enclosure(self.land_df.geometry.to_numpy())
 
-    def build_blocks(self, precision: int = 12) -> GeoDataFrame:
+    def build_blocks(
+        self, precision: int = 12, tile_precision: Optional[int] = None
+    ) -> GeoDataFrame:
         """Runs the entire blocking process pipeline.
 
         Args:
             precision (int, optional): The precision of the geohash. Defaults
                 to 12.
+            tile_precision (Optional[int], optional): If given, the region is
+                split into geohash tiles of this precision that are blocked
+                one at a time, which bounds the peak memory of the pipeline
+                by the size of a tile instead of the whole region. Defaults
+                to None, in which case the region is blocked at once. The
+                tiled blocks cover the same areas, but their vertices can
+                differ, and so can the block ids derived from them.
 
         Returns:
             GeoDataFrame: The blocks.
         """
+        if tile_precision is None:
+            blocks = self._run_stages()
+        else:
+            blocks = self._build_tiled_blocks(tile_precision)
+        blocks = self._geohash_blocks(blocks, precision)
+        return blocks
+
+    def _run_stages(self) -> GeoDataFrame:
+        """Runs the blocking stages that come before the geohashing.
+
+        Returns:
+            GeoDataFrame: The blocks, without identifiers.
+        """
         blocks = self._make_blocks()
         blocks = self._validate(blocks)
         blocks = self._add_back_water_features(blocks)
         blocks = self._validate(blocks)
         blocks = self._remove_overlaps(blocks)
         blocks = self._residual_area_check(blocks)
-        blocks = self._geohash_blocks(blocks, precision)
         return blocks
 
+    def _build_tiled_blocks(self, tile_precision: int) -> GeoDataFrame:
+        """Blocks the region one geohash tile at a time.
+
+        The land is clipped to each tile and blocked by its own blocker,
+        together with the lines that intersect the tile. The tile edges
+        become part of the land boundary, so the blocks crossing them are
+        split, and the pieces are merged back once every tile is done.
+
+        Args:
+            tile_precision (int): the geohash precision of the tiles.
+
+        Returns:
+            GeoDataFrame: The blocks, without identifiers.
+        """
+        land_tree = shapely.STRtree(self.land_df.geometry.to_numpy())
+        line_tree = shapely.STRtree(self.line_df.geometry.to_numpy())
+        tiles = self._geohash_tiles(land_tree, tile_precision)
+
+        results = []
+        for i, tile in enumerate(tiles):
+            logger.info("Blocking tile %s of %s.", i + 1, len(tiles))
+            land_idx = np.sort(land_tree.query(tile, predicate="intersects"))
+            line_idx = np.sort(line_tree.query(tile, predicate="intersects"))
+            tile_blocker = _TileBlocker(
+                region_code=self.region_code,
+                land_df=self.land_df.iloc[land_idx],
+                line_df=self.line_df.iloc[line_idx],
+                tile=tile,
+            )
+            if len(tile_blocker.land_df) == 0:
+                continue
+            blocks = tile_blocker._run_stages()
+            results.append(blocks.assign(_tile=i))
+
+        blocks = pd.concat(results, ignore_index=True)
+        return self._merge_tile_edges(blocks, tiles)
+
+    @staticmethod
+    def _geohash_tiles(
+        land_tree: shapely.STRtree, tile_precision: int
+    ) -> np.ndarray:
+        """Lists the geohash cells that intersect the land.
+
+        Args:
+            land_tree (shapely.STRtree): the tree of the land polygons.
+            tile_precision (int): the geohash precision of the cells.
+
+        Returns:
+            np.ndarray: the cells as rectangular polygons.
+        """
+        nbits = tile_precision * 5
+        size = np.array(
+            [360 / 2 ** ((nbits + 1) // 2), 180 / 2 ** (nbits // 2)]
+        )
+        bounds = shapely.total_bounds(land_tree.geometries)
+        low = np.floor((bounds[:2] + [180, 90]) / size).astype(int)
+        high = np.floor((bounds[2:] + [180, 90]) / size).astype(int)
+        cols, rows = np.meshgrid(
+            np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1)
+        )
+        minx = cols.ravel() * size[0] - 180
+        miny = rows.ravel() * size[1] - 90
+        cells = shapely.box(minx, miny, minx + size[0], miny + size[1])
+        hits = land_tree.query(cells, predicate="intersects")
+        return cells[np.unique(hits[0])]
+
+    def _merge_tile_edges(
+        self, blocks: GeoDataFrame, tiles: np.ndarray
+    ) -> GeoDataFrame:
+        """Merges the blocks that were split by the edges of their tiles.
+
+        Two blocks from different tiles that share a stretch of boundary
+        were a single block before the split, so the connected groups of
+        such blocks are dissolved back into one block each.
+
+        Args:
+            blocks (GeoDataFrame): the blocks of every tile, with the
+                position of their tile in the _tile column.
+            tiles (np.ndarray): the tiles the blocks were built in.
+
+        Returns:
+            GeoDataFrame: the merged blocks.
+        """
+        logger.info("Merging blocks across tile edges.")
+        tile = blocks["_tile"].to_numpy()
+        geoms = blocks.geometry.to_numpy()
+        edge = np.flatnonzero(
+            shapely.intersects(geoms, shapely.boundary(tiles[tile]))
+        )
+        tree = shapely.STRtree(geoms[edge])
+        pairs = edge[tree.query(geoms[edge], predicate="intersects")]
+        pairs = pairs[:, tile[pairs[0]] < tile[pairs[1]]]
+        shared = shapely.intersection(geoms[pairs[0]], geoms[pairs[1]])
+        pairs = pairs[:, shapely.length(shared) > 0]
+
+        labels = np.arange(len(blocks))
+        while True:
+            merged = labels.copy()
+            np.minimum.at(merged, pairs[0], labels[pairs[1]])
+            np.minimum.at(merged, pairs[1], labels[pairs[0]])
+            if np.array_equal(merged, labels):
+                break
+            labels = merged
+
+        split = pd.Series(labels).duplicated(keep=False).to_numpy()
+        merged_df = self._dissolve_groups(blocks[split], labels[split])
+        blocks = pd.concat([blocks[~split], merged_df], ignore_index=True)
+        return self._validate(blocks.drop(columns="_tile"))
+
     def _remove_overlaps(self, blocks: GeoDataFrame) -> GeoDataFrame:
         """Removes overlapping blocks.
 
@@ -97,40 +387,33 @@ class Blocker:
             GeoDataFrame: The blocks with overlaps removed. there could still
                 be overlapping blocks.
         """
-        blocks = blocks[blocks.to_crs(3395).area > 1]
+        blocks = blocks[mercator_area(blocks.geometry.values) > 1]
         blocks = blocks.reset_index(drop=True)
 
-        geoms = blocks[["geometry"]]
-        overlap = gpd.sjoin(geoms, geoms, how="inner", predicate="overlaps")
+        geoms = blocks.geometry.to_numpy()
+        overlap = self._overlapping_pairs(geoms)
 
-        if len(overlap) == 0:
+        if overlap.shape[1] == 0:
             return blocks
 
         # remove duplicate pairs
-        unique_overlap_ids = overlap.index.unique()
-        overlap = overlap[overlap.index > overlap["index_right"]]
-        logger.info("Removing %s overlapping blocks", len(overlap))
-        overlap_geom = shapely.boundary(overlap.geometry)
+        unique_overlap_ids = np.unique(overlap)
+        overlap = overlap[:, overlap[0] > overlap[1]]
+        logger.info("Removing %s overlapping blocks", overlap.shape[1])
+        overlap_geom = shapely.boundary(geoms[overlap[0]])
         overlap_geom = shapely.line_merge(overlap_geom)
         overlap_geom = shapely.union_all((overlap_geom,))
         overlap_geom = shapely.polygonize((overlap_geom,))
         overlap_geom = shapely.normalize(shapely.get_parts(overlap_geom))
-        overlap_geom = shapely.get_parts(overlap_geom)
         overlap_geom = shapely.make_valid(overlap_geom)
-        overlap_df = GeoDataFrame(geometry=overlap_geom).set_crs(4326)
-        overlap_df = gpd.overlay(
-            df1=overlap_df,
-            df2=blocks[~blocks.index.isin(unique_overlap_ids)],
-            how="difference",
-            keep_geom_type=True,
-            make_valid=True,
+        kept_df = blocks[~blocks.index.isin(unique_overlap_ids)]
+        overlap_geom = self._difference(
+            overlap_geom, kept_df.geometry.to_numpy()
         )
-        overlap_df.index = overlap.index
+        overlap_df = GeoDataFrame(geometry=overlap_geom).set_crs(4326)
+        overlap_df.index = overlap[0]
         corrected_df = pd.concat(
-            [
-                blocks[~blocks.index.isin(unique_overlap_ids)][["geometry"]],
-                overlap_df[["geometry"]],
-            ]
+            [kept_df[["geometry"]], overlap_df[["geometry"]]]
         )
         corrected_df = corrected_df.merge(
             blocks.drop(columns="geometry"),
@@ -139,26 +422,37 @@ class Blocker:
             right_index=True,
         )
 
-        corrected_df["geometry"] = corrected_df["geometry"].make_valid()
-        corrected_df = corrected_df.dissolve(by=corrected_df.index)
+        corrected_df["geometry"] = shapely.make_valid(
+            corrected_df.geometry.values
+        )
+
+        # only blocks split into several pieces need to be dissolved
+        split = corrected_df.index.duplicated(keep=False)
+        dissolved = self._dissolve_groups(
+            corrected_df[split], corrected_df.index[split].to_numpy()
+        )
+        corrected_df = pd.concat([corrected_df[~split], dissolved])
+        corrected_df = corrected_df.sort_index()
 
-        geoms = corrected_df[["geometry"]]
-        overlap = gpd.sjoin(geoms, geoms, how="inner", predicate="overlaps")
+        geoms = corrected_df.geometry.to_numpy()
+        overlap = self._overlapping_pairs(geoms)
 
-        if len(overlap) > 0:
+        if overlap.shape[1] > 0:
             logger.warning("Unable to remove all overlapping blocks.")
-            logger.warning("%s blocks remain overlapping.", len(overlap))
-            overlap_intersection = gpd.overlay(
-                df1=overlap,
-                df2=overlap,
-                how="intersection",
-                keep_geom_type=True,
-                make_valid=True,
-            )
             logger.warning(
-                "Unresolved intersection area: %.4f sq. km",
-                self._m2tokm2(overlap_intersection.to_crs(3395).area.sum()),
+                "%s blocks remain overlapping.", len(np.unique(overlap))
             )
+            # the intersection area is only computed for this log message,
+            # so it is left to debug runs
+            if logger.isEnabledFor(logging.DEBUG):
+                overlap = overlap[:, overlap[0] > overlap[1]]
+                overlap_intersection = shapely.intersection(
+                    geoms[overlap[0]], geoms[overlap[1]]
+                )
+                logger.debug(
+                    "Unresolved intersection area: %.4f sq. km",
+                    self._m2tokm2(mercator_area(overlap_intersection).sum()),
+                )
         logger.info("All overlapping blocks removed.")
 
         return corrected_df
@@ -177,8 +471,7 @@ class Blocker:
             GeoDataFrame: The blocks with the residual area added.
         """
         residual_area = (
-            self.land_df.to_crs(3395).area.sum()
-            - blocks.to_crs(3395).area.sum()
+            self._land_area - mercator_area(blocks.geometry.values).sum()
         )
         if residual_area <= 0:
             return blocks
@@ -186,17 +479,20 @@ class Blocker:
         logger.warning(
             "Residual area: %.4f sq. km", self._m2tokm2(residual_area)
         )
-        residue = self.land_df["geometry"].unary_union.difference(
-            blocks["geometry"].unary_union
+        residue = shapely.difference(
+            shapely.union_all(self.land_df.geometry.values),
+            shapely.union_all(blocks.geometry.values),
+        )
+        residue = shapely.get_parts(residue)
+        residue_df = GeoDataFrame(
+            geometry=residue[~shapely.is_empty(residue)], crs=4326
         )
-        residue_df = GeoDataFrame(geometry=[residue]).set_crs(4326)
-        residue_df = residue_df.explode(index_parts=False)
         logger.warning(
             "Adding %.4f sq. km of residual area to blocks",
-            self._m2tokm2(residue_df.to_crs(3395).area.sum()),
+            self._m2tokm2(mercator_area(residue_df.geometry.values).sum()),
         )
         blocks = pd.concat([blocks, residue_df], ignore_index=True)
-        blocks["code"] = blocks["code"].fillna(method="ffill")
+        blocks["code"] = blocks["code"].fillna(self.region_code)
         return blocks
 
     def _add_back_water_features(self, blocks: GeoDataFrame) -> GeoDataFrame:
@@ -214,44 +510,35 @@ class Blocker:
             GeoDataFrame: the blocks with water features added back.
         """
         resid_area = (
-            blocks.geometry.to_crs(3395).area.sum()
-            - self.land_df.geometry.to_crs(3395).area.sum()
+            mercator_area(blocks.geometry.values).sum() - self._land_area
         )
         if resid_area > 0:
             logger.info(
                 f"Adding back {self._m2tokm2(resid_area):.4f} km^2 of water."
             )
-            blocks = gpd.overlay(
-                df1=blocks,
-                df2=self.land_df,
-                how="intersection",
-                keep_geom_type=True,
-                make_valid=True,
-            )
+            blocks = self._tiled_overlay(blocks, self.land_df[["geometry"]])
         return blocks
 
     def _make_blocks(self) -> GeoDataFrame:
         """A helper function to make blocks from land and line geometries.
 
-        It first converts the land and line geometries to WGS84, then
-        it merges the land and line geometries, then it polygonizes the
+        It merges the land and line geometries, then it polygonizes the
         union of the land and line geometries. Finally, it returns a
         GeoDataFrame of the polygonized blocks.
 
         Returns:
             GeoDataFrame: GeoDataFrame of the polygonized blocks.
         """
-        linegeo = shapely.set_srid(self.line_df.geometry.to_crs(4326), 4326)
-        linegeo = shapely.multilinestrings(linegeo)
-
-        landgeo = shapely.set_srid(self.land_df.geometry.to_crs(4326), 4326)
-        landgeo = shapely.multipolygons(landgeo)
-
-        all_lines = self._merge_land_lines(landgeo, linegeo)
-        land_enclosure = self._get_land_enclosure(landgeo)
-        blocks = self._polygonize(land_enclosure, all_lines)
+        all_lines = self._merge_land_lines(
+            self.land_df.geometry.to_numpy(), self.line_df.geometry.to_numpy()
+        )
+        blocks = self._polygonize(self._land_enclosure, all_lines)
 
-        gdf = GeoDataFrame(data={"geometry": blocks}).set_crs(4326)
+        gdf = GeoDataFrame(
+            data={"code": np.full(len(blocks), self.region_code)},
+            geometry=blocks,
+            crs=4326,
+        )
 
         return gdf
 
@@ -272,10 +559,11 @@ class Blocker:
         )
         blocks = shapely.union_all((land, line))
         blocks = shapely.polygonize((blocks,))
-        blocks = shapely.get_parts(
-            shapely.normalize(shapely.get_parts(blocks))
-        )
-        blocks = shapely.make_valid(blocks)
+        blocks = shapely.normalize(shapely.get_parts(blocks))
+        # polygonized faces are nearly always valid already
+        invalid = ~shapely.is_valid(blocks)
+        if invalid.any():
+            blocks[invalid] = shapely.make_valid(blocks[invalid])
         return blocks
 
     @staticmethod
@@ -288,10 +576,33 @@ class Blocker:
         Returns:
             GeoDataFrame: the validated GeoDataFrame.
         """
-        gdf["geometry"] = gdf["geometry"].make_valid()
-        gdf = gdf.explode(index_parts=False)
-        gdf = gdf[gdf.geom_type == "Polygon"]
-        return gdf
+        geoms = gdf.geometry.to_numpy()
+        invalid = ~shapely.is_valid(geoms)
+        if invalid.any():
+            geoms = geoms.copy()
+            geoms[invalid] = shapely.make_valid(geoms[invalid])
+        return Blocker._polygon_parts(gdf.set_geometry(geoms))
+
+    @staticmethod
+    def _polygon_parts(gdf: GeoDataFrame) -> GeoDataFrame:
+        """Explodes a GeoDataFrame keeping only its polygons.
+
+        The parts are taken from the geometry array in one vectorized call,
+        instead of exploding the frame and then filtering it by geom_type.
+
+        Args:
+            gdf (GeoDataFrame): the GeoDataFrame to explode.
+
+        Returns:
+            GeoDataFrame: a row per polygon part, with the index and columns
+                of the row it was taken from.
+        """
+        parts, index = shapely.get_parts(
+            gdf.geometry.to_numpy(), return_index=True
+        )
+        is_polygon = shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+        gdf = gdf.iloc[index[is_polygon]]
+        return gdf.set_geometry(parts[is_polygon], crs=gdf.crs)
 
     @staticmethod
     def _geohash_blocks(blocks: GeoDataFrame, precision: int) -> GeoDataFrame:
@@ -305,8 +616,10 @@ class Blocker:
             GeoDataFrame: the blocks with a geohash.
         """
         logger.info("Geohashing blocks.")
-        blocks["geohash"] = blocks.geometry.representative_point().apply(
-            lambda x: pgh.encode(x.y, x.x, precision=precision)
+        coords = blocks.geometry.representative_point().get_coordinates()
+        coords = coords.to_numpy()
+        blocks["geohash"] = _encode_geohash(
+            lats=coords[:, 1], lons=coords[:, 0], precision=precision
         )
         blocks = blocks.sort_values(by="geohash", ascending=False)
         blocks = blocks.reset_index(drop=True)
@@ -321,6 +634,160 @@ class Blocker:
         blocks = blocks.drop(columns=["code", "geohash", "georank"])
         return blocks
 
+    @staticmethod
+    def _tiled_overlay(df1: GeoDataFrame, df2: GeoDataFrame) -> GeoDataFrame:
+        """Intersects two GeoDataFrames tile by tile.
+
+        The geometries of df1 are bucketed into a coarse grid of about
+        sqrt(n) tiles, and each tile is overlaid on a thread pool against
+        the df2 geometries within its bounds. The intersection of a geometry
+        only depends on the geometries it intersects, so the result is the
+        same as a single overlay of the two frames.
+
+        Args:
+            df1 (GeoDataFrame): the geometries to intersect.
+            df2 (GeoDataFrame): the geometries to intersect df1 with.
+
+        Returns:
+            GeoDataFrame: the overlay, in the order of df1 and without the
+                geometries that became empty.
+        """
+        if len(df1) == 0:
+            return df1.reset_index(drop=True)
+
+        side = math.ceil(math.sqrt(math.sqrt(len(df1))))
+        bounds = df1.bounds.to_numpy()
+        centers = (bounds[:, :2] + bounds[:, 2:]) / 2
+        low, high = centers.min(axis=0), centers.max(axis=0)
+        cells = (centers - low) / np.maximum(high - low, 1e-12) * side
+        cells = np.minimum(cells.astype(int), side - 1)
+        tiles = cells[:, 0] * side + cells[:, 1]
+
+        df1 = df1.assign(_order=np.arange(len(df1)))
+        tree = shapely.STRtree(df2.geometry.to_numpy())
+
+        def overlay_tile(tile_df: GeoDataFrame) -> GeoDataFrame:
+            others = tree.query(shapely.box(*tile_df.total_bounds))
+            return gpd.overlay(
+                df1=tile_df,
+                df2=df2.iloc[np.sort(others)],
+                how="intersection",
+                keep_geom_type=True,
+                make_valid=True,
+            )
+
+        with ThreadPoolExecutor() as executor:
+            results = executor.map(
+                overlay_tile, (group for _, group in df1.groupby(tiles))
+            )
+            result = pd.concat(results)
+        result = result.sort_values("_order", kind="stable")
+        result = result.drop(columns="_order")
+        return result.reset_index(drop=True)
+
+    @staticmethod
+    def _difference(geoms: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Subtracts the intersecting polygons of others from each polygon.
+
+        The intersecting pairs are found on an STRtree, and each polygon is
+        differenced once against the union of the polygons it intersects,
+        without the frame bookkeeping of an overlay.
+
+        Args:
+            geoms (np.ndarray): the polygons to take the difference of.
+            others (np.ndarray): the polygons to subtract.
+
+        Returns:
+            np.ndarray: the polygonal part of the differences, without the
+                ones that became empty.
+        """
+        tree = shapely.STRtree(others)
+        idx, other_idx = tree.query(geoms, predicate="intersects")
+        order = np.argsort(idx, kind="stable")
+        idx, other_idx = idx[order], other_idx[order]
+
+        result = geoms.copy()
+        if len(idx) > 0:
+            rows, starts = np.unique(idx, return_index=True)
+            groups = np.split(others[other_idx], starts[1:])
+            subtract = np.array([shapely.union_all(g) for g in groups])
+            result[rows] = shapely.make_valid(
+                shapely.difference(geoms[rows], subtract)
+            )
+
+        # keep only the polygons of mixed collections
+        is_collection = (
+            shapely.get_type_id(result)
+            == shapely.GeometryType.GEOMETRYCOLLECTION
+        )
+        for i in np.flatnonzero(is_collection):
+            parts = shapely.get_parts(result[i])
+            is_polygon = np.isin(
+                shapely.get_type_id(parts),
+                [
+                    shapely.GeometryType.POLYGON,
+                    shapely.GeometryType.MULTIPOLYGON,
+                ],
+            )
+            result[i] = shapely.union_all(parts[is_polygon])
+        return result[~shapely.is_empty(result)]
+
+    @staticmethod
+    def _dissolve_groups(df: GeoDataFrame, keys: np.ndarray) -> GeoDataFrame:
+        """Dissolves the rows of a GeoDataFrame that share a key.
+
+        Like ``df.dissolve(by=keys)`` keeping the first value of every
+        column, but the groups of two rows, by far the most common ones, are
+        unioned in a single vectorized call instead of one groupby
+        aggregation per group.
+
+        Args:
+            df (GeoDataFrame): the rows to dissolve.
+            keys (np.ndarray): the group key of every row.
+
+        Returns:
+            GeoDataFrame: one row per key, indexed and sorted by key.
+        """
+        order = np.argsort(keys, kind="stable")
+        geoms = df.geometry.to_numpy()[order]
+        groups, starts, counts = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+
+        merged = geoms[starts]
+        pairs = counts == 2
+        merged[pairs] = shapely.union(
+            geoms[starts[pairs]], geoms[starts[pairs] + 1]
+        )
+        for i in np.flatnonzero(counts > 2):
+            merged[i] = shapely.union_all(
+                geoms[starts[i] : starts[i] + counts[i]]
+            )
+
+        dissolved = df.iloc[order[starts]].copy()
+        dissolved.index = groups
+        dissolved[df.geometry.name] = merged
+        return dissolved
+
+    @staticmethod
+    def _overlapping_pairs(geoms: np.ndarray) -> np.ndarray:
+        """Finds the pairs of overlapping geometries.
+
+        The pairs are queried directly on a shapely STRtree, which avoids
+        building the intermediate GeoDataFrames of a spatial join.
+
+        Args:
+            geoms (np.ndarray): the geometries to check.
+
+        Returns:
+            np.ndarray: a (2, n) array with the positions of every pair of
+                overlapping geometries, in both orders, sorted by the first
+                position.
+        """
+        tree = shapely.STRtree(geoms)
+        pairs = tree.query(geoms, predicate="overlaps")
+        return pairs[:, np.lexsort((pairs[1], pairs[0]))]
+
     @staticmethod
     def _m2tokm2(m2: float) -> float:
         """Converts square meters to square kilometers.
@@ -335,35 +802,92 @@ class Blocker:
 
     @staticmethod
     def _merge_land_lines(
-        land: MultiPolygon, line: MultiLineString
+        land: np.ndarray, line: np.ndarray
     ) -> MultiLineString:
-        """Merges the land and line MultiPolygons.
+        """Merges the land and line geometries.
+
+        The lines are only intersected with the land polygons they hit on
+        an STRtree, so GEOS works on the small pairs that matter instead of
+        overlaying the two whole geometries. Lines that lie properly inside
+        their polygon, most of them, are kept as they are without clipping.
+        Both inputs are split into their parts, so they can be arrays or
+        single multi-part geometries.
 
         Args:
-            land (MultiPolygon): the MultiPolygon of land.
-            line (MultiLineString): the MultiLineString of lines.
+            land (np.ndarray): the land polygons.
+            line (np.ndarray): the linestrings.
 
         Returns:
             MultiLineString: the merged MultiLineString.
         """
-        line = shapely.intersection_all((line, land))
+        land_parts = shapely.get_parts(land)
+        line_parts = shapely.get_parts(line)
+        tree = shapely.STRtree(line_parts)
+        land_idx, line_idx = tree.query(land_parts, predicate="intersects")
+        # the prepared containment test is far cheaper than the clipping
+        inside = tree.query(land_parts, predicate="contains_properly")
+        n = len(line_parts)
+        crossing = ~np.isin(land_idx * n + line_idx, inside[0] * n + inside[1])
+
+        parts = line_parts[line_idx]
+        parts[crossing] = shapely.intersection(
+            parts[crossing], land_parts[land_idx[crossing]]
+        )
+        parts = shapely.get_parts(parts)
+        is_line = shapely.get_type_id(parts) == shapely.GeometryType.LINESTRING
+        line = shapely.multilinestrings(parts[is_line])
         line = shapely.line_merge(line)
         return line
 
     @staticmethod
-    def _get_land_enclosure(land: MultiPolygon) -> MultiLineString:
-        """Gets the enclosure of a MultiPolygon.
+    def _get_land_enclosure(land: np.ndarray) -> MultiLineString:
+        """Gets the enclosure of land polygons.
+
+        The exterior rings are closed, so they are returned as they are
+        without merging them.
 
         Args:
-            land (MultiPolygon): the MultiPolygon to get the enclosure of.
+            land (np.ndarray): the land polygons, as an array or a single
+                multi-part geometry.
 
         Returns:
-            MultiLineString: the enclosure of the MultiPolygon.
+            MultiLineString: the enclosure of the polygons.
         """
         parts = shapely.get_parts(land)
         ext_ring = shapely.get_exterior_ring(parts)
-        ext_ring = shapely.multilinestrings(ext_ring)
-        return shapely.line_merge(ext_ring)
+        return shapely.multilinestrings(ext_ring)
+
+
+@dataclass
+class _TileBlocker(Blocker):
+    """Generate block geometries for one tile of a larger region.
+
+    The land polygons are clipped to the tile, so a lake cut by the tile
+    edge would become part of the land boundary and split the blocks around
+    it. The enclosure is therefore taken from the land polygons with their
+    holes filled before clipping, as when the region is blocked at once.
+
+    Attributes:
+        tile (Polygon): the tile to block.
+    """
+
+    tile: Polygon
+
+    def __post_init__(self) -> None:
+        land = self.land_df.geometry.to_numpy()
+        filled = shapely.polygons(shapely.get_exterior_ring(land))
+        self._filled_land = shapely.intersection(filled, self.tile)
+        self.land_df = self.land_df.set_geometry(
+            shapely.intersection(land, self.tile), crs=self.land_df.crs
+        )
+        super().__post_init__()
+
+    @cached_property
+    def _land_enclosure(self) -> MultiLineString:
+        """The exterior rings of the filled land clipped to the tile."""
+        parts = shapely.get_parts(self._filled_land)
+        is_polygon = shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+        return self._get_land_enclosure(parts[is_polygon])
 
 
 @dataclass
@@ -380,15 +904,8 @@ class GeoPullBlocker(Blocker):
     def __post_init__(self):
         if self.region_code.islower():
             self.region_code = self.region_code.upper()
-        land_parq = ParquetFeatureFile(
-            country_code=self.region_code, features="admin"
-        )
-        line_parq = ParquetFeatureFile(
-            country_code=self.region_code, features="linestring"
-        )
-        land_df = land_parq.gdf
-        line_df = line_parq.gdf
-        land_df = land_df.rename(columns={"iso3": "code"})
-        self.land_df = land_df
-        self.line_df = line_df
+        land_df, line_df = load_country_features(self.region_code)
+        # the cached frames are shared, so the blocker works on copies
+        self.land_df = land_df.copy()
+        self.line_df = line_df.copy()
         super().__post_init__()
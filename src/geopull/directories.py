@@ -14,6 +14,9 @@ from pathlib import Path
 class DataDir:
     """
     Class for managing the data directory structure of the project.
+
+    The whole directory tree is created once on initialization, so the
+    directory properties only build paths.
     """
 
     def __init__(self, root_path: str) -> None:
@@ -36,8 +39,10 @@ class DataDir:
         data = root.joinpath("data")
         data.mkdir(exist_ok=True)
         data.joinpath("osm").mkdir(exist_ok=True)
-        for subdir in ("pbf", "geojson"):
+        for subdir in ("pbf", "geojson", "parquet"):
             data.joinpath("osm", subdir).mkdir(exist_ok=True)
+        for subdir in ("daylight", "blocks"):
+            data.joinpath(subdir).mkdir(exist_ok=True)
         self.data = data
 
     @property
@@ -48,9 +53,7 @@ class DataDir:
         Returns:
             Path: path to the PBF files directory.
         """
-        pbf_dir = self.data.joinpath("osm", "pbf")
-        pbf_dir.mkdir(exist_ok=True)
-        return pbf_dir
+        return self.data.joinpath("osm", "pbf")
 
     @property
     def osm_geojson_dir(self) -> Path:
@@ -60,9 +63,7 @@ class DataDir:
         Returns:
             Path: path to the GeoJSON files directory.
         """
-        geojson_dir = self.data.joinpath("osm", "geojson")
-        geojson_dir.mkdir(exist_ok=True)
-        return geojson_dir
+        return self.data.joinpath("osm", "geojson")
 
     @property
     def osm_parquet_dir(self) -> Path:
@@ -72,9 +73,7 @@ class DataDir:
         Returns:
             Path: path to the Parquet files directory.
         """
-        parquet_dir = self.data.joinpath("osm", "parquet")
-        parquet_dir.mkdir(exist_ok=True)
-        return parquet_dir
+        return self.data.joinpath("osm", "parquet")
 
     @property
     def daylight_dir(self) -> Path:
@@ -84,9 +83,7 @@ class DataDir:
         Returns:
             Path: path to the daylight files directory.
         """
-        daylight_dir = self.data.joinpath("daylight")
-        daylight_dir.mkdir(exist_ok=True)
-        return daylight_dir
+        return self.data.joinpath("daylight")
 
     @property
     def blocks_dir(self) -> Path:
@@ -95,6 +92,4 @@ class DataDir:
         Returns:
             Path: path to the blocks files directory.
         """
-        blocks_dir = self.data.joinpath("blocks")
-        blocks_dir.mkdir(exist_ok=True)
-        return blocks_dir
+        return self.data.joinpath("blocks")
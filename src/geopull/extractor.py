@@ -5,7 +5,9 @@ Contains extractor recipes for extracting features from OSM PBF files.
 
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import Any, ClassVar
 
 from geopull.directories import DataDir
 from geopull.geofile import GeoJSONFeatureFile, PBFFile
@@ -42,32 +44,106 @@ class GeopullExtractor(Extractor):
 
     Attributes:
         datadir (DataDir): the data directory.
+        single_pass (bool): export the three feature sets in a single read
+            of the PBF file with `PBFFile.export_multi`. If False each set
+            is exported by its own osmium export run. Defaults to False.
     """
 
+    single_pass: bool = False
+    attributes: ClassVar[list[str]] = [
+        "type",
+        "id",
+        "version",
+        "changeset",
+        "timestamp",
+    ]
+    water_spec: ClassVar[dict[str, Any]] = {
+        "attributes": attributes,
+        "include_tags": [
+            "natural=water",
+            "coastline",
+            "strait",
+            "bay",
+            "hot_spring",
+            "shoal",
+            "spring",
+            "waterway",
+            "water",
+        ],
+        "geometry_type": "polygon",
+        "suffix": "water",
+    }
+    linestring_spec: ClassVar[dict[str, Any]] = {
+        "attributes": attributes,
+        "include_tags": [
+            "natural!=coastline,reef",
+            "barrier=city_wall,ditch",
+            "route",
+            "railway",
+            "highway!=footway,bridleway,steps,corridor,path,cycleway",
+            "waterway",
+            (
+                "boundary!=administrative,place,political,postal_code,"
+                "special_economic_zone,user_defined,maritime"
+            ),
+        ],
+        "geometry_type": "linestring",
+        "suffix": "linestring",
+    }
+    admin_spec: ClassVar[dict[str, Any]] = {
+        "attributes": attributes,
+        # the normalizer only ever keeps the level 2 or level 4 features
+        "include_tags": ["admin_level=2,4"],
+        "geometry_type": "polygon",
+        "suffix": "admin",
+    }
+
     def extract(self, pbf: PBFFile) -> list[GeoJSONFeatureFile]:
-        results = []
-        results.append(self._extract_water(pbf))
-        results.append(self._extract_linestring(pbf))
-        results.append(self._extract_admin(pbf))
-        return results
+        """Extracts the water, linestring and admin features of a PBF file.
+
+        With `single_pass` the three feature sets are written from one read
+        of the PBF file. Otherwise each step runs its own osmium export
+        subprocess, so the three steps are run concurrently on a thread pool.
+
+        Args:
+            pbf (PBFFile): the PBF file to extract from.
+
+        Returns:
+            list[GeoJSONFeatureFile]: the water, linestring and admin files.
+        """
+        if self.single_pass:
+            outputs = pbf.export_multi(
+                [self.water_spec, self.linestring_spec, self.admin_spec],
+                overwrite=self.overwrite,
+            )
+            return [GeoJSONFeatureFile.from_path(path) for path in outputs]
+
+        steps = (
+            self._extract_water,
+            self._extract_linestring,
+            self._extract_admin,
+        )
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            futures = [executor.submit(step, pbf) for step in steps]
+            return [future.result() for future in futures]
 
     def _extract_admin(self, pbf: PBFFile) -> GeoJSONFeatureFile:
         """Extracts admin levels from a PBF file into a parquet file.
 
-        Only the admin levels that are one level higher than 2 for the given
-        pbf file are extract. For example if the admin levels on a country are
-        {2, 4, 6, 8} then only the admin level 4 features are extracted.
+        Only the admin level 2 and 4 features are exported, since the
+        normalizer keeps the level 4 features when they cover the country and
+        the level 2 ones otherwise. The finer levels, which are most of the
+        admin polygons, are never written. As they are a small part of the
+        file, it is prefiltered with osmium tags-filter before the export.
 
         Args:
             pbf (PBFFile): the PBF file to extract from.
         """
         output = pbf.export(
-            attributes=["type", "id", "version", "changeset", "timestamp"],
-            include_tags=["admin_level"],
-            geometry_type="polygon",
+            **self.admin_spec,
             overwrite=self.overwrite,
             progress=self.progress,
-            suffix="admin",
+            prefilter=True,
         )
         return GeoJSONFeatureFile.from_path(output)
 
@@ -80,23 +156,9 @@ class GeopullExtractor(Extractor):
             pbf (PBFFile): The PBF file to extract from.
         """
         output = pbf.export(
-            attributes=["type", "id", "version", "changeset", "timestamp"],
-            include_tags=[
-                "natural!=coastline,reef",
-                "barrier=city_wall,ditch",
-                "route",
-                "railway",
-                "highway!=footway,bridleway,steps,corridor,path,cycleway",
-                "waterway",
-                (
-                    "boundary!=administrative,place,political,postal_code,"
-                    "special_economic_zone,user_defined,maritime"
-                ),
-            ],
-            geometry_type="linestring",
+            **self.linestring_spec,
             overwrite=self.overwrite,
             progress=self.progress,
-            suffix="linestring",
         )
         return GeoJSONFeatureFile.from_path(output)
 
@@ -105,26 +167,16 @@ class GeopullExtractor(Extractor):
 
         These features are needed to create the blocks as well since the
         blocks are should be delineated by water features and not go over them.
+        As they are a small part of the file, it is prefiltered before the
+        export.
 
         Args:
             pbf (PBFFile): The PBF file to extract from.
         """
         output = pbf.export(
-            attributes=["type", "id", "version", "changeset", "timestamp"],
-            include_tags=[
-                "natural=water",
-                "coastline",
-                "strait",
-                "bay",
-                "hot_spring",
-                "shoal",
-                "spring",
-                "waterway",
-                "water",
-            ],
-            geometry_type="polygon",
+            **self.water_spec,
             overwrite=self.overwrite,
             progress=self.progress,
-            suffix="water",
+            prefilter=True,
         )
         return GeoJSONFeatureFile.from_path(output)
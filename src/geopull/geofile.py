@@ -13,37 +13,378 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from functools import cached_property
 from importlib.resources import files
 from pathlib import Path
-from subprocess import run
+from subprocess import DEVNULL, PIPE, CalledProcessError, run
 from tempfile import NamedTemporaryFile
-from typing import Any, ClassVar, Optional
-from urllib.request import urlretrieve
-
-import geopandas as gpd
-from geopandas import GeoDataFrame
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from urllib.request import urlopen
+
+import osmium
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from pyproj import CRS
 
 from geopull.directories import DataDir
 from geopull.tqdm_download import TqdmUpTo
 
+# geopandas, pandas and pyogrio (which imports geopandas) are imported by the
+# methods that read features, so downloading and exporting PBF files does not
+# load them
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    import pandas as pd
+    from geopandas import GeoDataFrame
+
 logger = logging.getLogger(__name__)
 
 
-def load_country_codes() -> dict[str, list[str]]:
+class CountryNames(NamedTuple):
+    """The names of a country in the Geofabrik listings."""
+
+    country_name: str
+    continent: str
+    proper_name: str
+
+
+def load_country_codes() -> dict[str, CountryNames]:
     """
     Loads the country codes from the json file.
 
     Returns:
-        dict[str, list[str]]: dictionary of country codes
+        dict[str, CountryNames]: dictionary of country codes
     """
     with files("geopull").joinpath("iso2geofabrik.json").open() as f:
-        return json.load(f)
+        return {
+            code: CountryNames(*names) for code, names in json.load(f).items()
+        }
 
 
 COUNTRYMAP = load_country_codes()
 
+# the parquet outputs are written once and read many times, and zstd makes
+# them about a fifth smaller than the default snappy at the same read speed
+PARQUET_COMPRESSION = "zstd"
+# small enough for the row group bounds to be selective on bbox reads
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+OSM_ATTRIBUTE_TYPES: dict[str, pa.DataType] = {
+    "type": pa.string(),
+    "id": pa.int64(),
+    "version": pa.int64(),
+    "changeset": pa.int64(),
+    "timestamp": pa.string(),
+    "uid": pa.int64(),
+    "user": pa.string(),
+}
+
+
+def geoparquet_metadata(
+    crs: Optional[CRS], covering: bool = False
+) -> dict[str, str]:
+    """
+    Builds the GeoParquet schema metadata of a WKB geometry column.
+
+    Args:
+        crs (Optional[CRS]): the crs of the geometries, if known.
+        covering (bool, optional): whether the file has a bbox covering
+            column with xmin, ymin, xmax and ymax fields. Defaults to False.
+
+    Returns:
+        dict[str, str]: the schema metadata
+    """
+    column: dict[str, Any] = {"encoding": "WKB", "geometry_types": []}
+    if crs is not None:
+        column["crs"] = crs.to_json_dict()
+    if covering:
+        column["covering"] = {
+            "bbox": {
+                name: ["bbox", name]
+                for name in ("xmin", "ymin", "xmax", "ymax")
+            }
+        }
+    geo = {
+        "version": "1.1.0" if covering else "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": column},
+    }
+    return {"geo": json.dumps(geo)}
+
+
+def convert_to_geoparquet(
+    source: str | Path, path: Path, batch_size: int = PARQUET_ROW_GROUP_SIZE
+) -> None:
+    """
+    Converts a vector file into a GeoParquet file with a bbox covering.
+
+    The features are streamed in Arrow batches, one row group each, and
+    their bounds are written to the bbox covering column, so reads with a
+    bbox can skip the row groups outside of it.
+
+    Args:
+        source (str | Path): the path of the file to convert, in any format
+            that GDAL can read.
+        path (Path): the path of the GeoParquet file to write.
+        batch_size (int, optional): number of features per row group.
+            Defaults to PARQUET_ROW_GROUP_SIZE.
+    """
+    from pyogrio.raw import open_arrow
+
+    with open_arrow(source, batch_size=batch_size, use_pyarrow=True) as (
+        meta,
+        reader,
+    ):
+        schema = reader.schema
+        geometry = schema.get_field_index(
+            meta["geometry_name"] or "wkb_geometry"
+        )
+        crs = CRS.from_user_input(meta["crs"]) if meta["crs"] else None
+        schema = schema.set(geometry, pa.field("geometry", pa.binary()))
+        bbox_type = pa.struct(
+            [(name, pa.float64()) for name in ("xmin", "ymin", "xmax", "ymax")]
+        )
+        schema = schema.append(pa.field("bbox", bbox_type))
+        schema = schema.with_metadata(geoparquet_metadata(crs, covering=True))
+        with pq.ParquetWriter(
+            path, schema, compression=PARQUET_COMPRESSION
+        ) as writer:
+            for batch in reader:
+                wkb = batch.column(geometry).to_numpy(zero_copy_only=False)
+                bounds = shapely.bounds(shapely.from_wkb(wkb))
+                bbox = pa.StructArray.from_arrays(
+                    [pa.array(col) for col in bounds.T],
+                    fields=list(bbox_type),
+                )
+                writer.write_batch(
+                    pa.RecordBatch.from_arrays(
+                        [*batch.columns, bbox], schema=schema
+                    )
+                )
+
+
+class FeatureStreamHandler(osmium.SimpleHandler):
+    """Streams the tagged features of an OSM file into a GeoParquet file.
+
+    The handler mirrors an ``osmium export`` run with the configuration built
+    by ``PBFFile._build_json_config``: only the tags matching one of the
+    ``include_tags`` expressions are kept, and objects left without tags are
+    skipped. Features are written in batches, so memory use is bounded by
+    the batch size instead of the size of the OSM file.
+
+    Args:
+        path (Path): the path of the GeoParquet file to write.
+        attributes (list[str]): list of OSM attributes to export.
+        include_tags (list[str]): list of osmium tag expressions, e.g.
+            ``highway``, ``natural=water`` or ``highway!=footway,steps``.
+        geometry_type (Optional[str], optional): the geometry type to
+            export. Defaults to None, in which case all the geometries are
+            exported.
+        batch_size (int, optional): number of features per written batch.
+            Defaults to 65536.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        attributes: list[str],
+        include_tags: list[str],
+        geometry_type: Optional[str] = None,
+        batch_size: int = 65536,
+    ) -> None:
+        super().__init__()
+        unknown = set(attributes) - OSM_ATTRIBUTE_TYPES.keys()
+        if unknown:
+            raise ValueError(f"unknown OSM attributes: {sorted(unknown)}")
+
+        self.attributes = attributes
+        self.rules: dict[str, list[tuple[bool, frozenset[str]]]] = {}
+        for expression in include_tags:
+            key, sep, values = expression.partition("=")
+            negate = key.endswith("!")
+            self.rules.setdefault(key.rstrip("!"), []).append(
+                (negate, frozenset(values.split(",")) if sep else frozenset())
+            )
+        self.batch_size = batch_size
+        self.factory: osmium.geom.WKBFactory | osmium.geom.GeoJSONFactory = (
+            osmium.geom.WKBFactory()
+        )
+
+        fields = [
+            pa.field(f"@{attr}", OSM_ATTRIBUTE_TYPES[attr])
+            for attr in attributes
+        ]
+        fields.extend(pa.field(key, pa.string()) for key in self.rules)
+        fields.append(pa.field("geometry", pa.binary()))
+        self.schema = pa.schema(
+            fields, metadata=geoparquet_metadata(CRS.from_epsg(4326))
+        )
+        self.batch: dict[str, list] = {name: [] for name in self.schema.names}
+        self._open(path)
+
+        # pyosmium only runs the callbacks that exist on the handler, and
+        # only assembles areas (a second pass) if there is an area callback
+        if geometry_type in (None, "point"):
+            self.node = self._node
+        if geometry_type in (None, "linestring"):
+            self.way = self._way
+        if geometry_type in (None, "polygon"):
+            self.area = self._area
+
+    def close(self) -> None:
+        """Writes the pending batch and closes the GeoParquet file."""
+        self._flush()
+        self.writer.close()
+
+    def _open(self, path: Path) -> None:
+        self.writer = pq.ParquetWriter(
+            path, self.schema, compression=PARQUET_COMPRESSION
+        )
+
+    def _node(self, node: osmium.osm.Node) -> None:
+        self._add(node, "node", node.id, self.factory.create_point)
+
+    def _way(self, way: osmium.osm.Way) -> None:
+        self._add(way, "way", way.id, self.factory.create_linestring)
+
+    def _area(self, area: osmium.osm.Area) -> None:
+        osm_type = "way" if area.from_way() else "relation"
+        self._add(
+            area, osm_type, area.orig_id(), self.factory.create_multipolygon
+        )
+
+    def _add(self, obj: Any, osm_type: str, osm_id: int, make_geom) -> None:
+        tags = {
+            tag.k: tag.v for tag in obj.tags if self._matches(tag.k, tag.v)
+        }
+        if not tags:
+            return
+        try:
+            geometry = make_geom(obj)
+        except (osmium.InvalidLocationError, RuntimeError):
+            return
+
+        values = {
+            "type": osm_type,
+            "id": osm_id,
+            "version": obj.version,
+            "changeset": obj.changeset,
+            "timestamp": obj.timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "uid": obj.uid,
+            "user": obj.user,
+        }
+        for attr in self.attributes:
+            self.batch[f"@{attr}"].append(values[attr])
+        for key in self.rules:
+            self.batch[key].append(tags.get(key))
+        self.batch["geometry"].append(geometry)
+
+        if len(self.batch["geometry"]) >= self.batch_size:
+            self._flush()
+
+    def _matches(self, key: str, value: str) -> bool:
+        return any(
+            not values or (value in values) != negate
+            for negate, values in self.rules.get(key, ())
+        )
+
+    def _flush(self) -> None:
+        if not self.batch["geometry"]:
+            return
+        self._write_batch()
+        self.batch = {name: [] for name in self.schema.names}
+
+    def _write_batch(self) -> None:
+        self.batch["geometry"] = [
+            bytes.fromhex(geometry) for geometry in self.batch["geometry"]
+        ]
+        table = pa.Table.from_pydict(self.batch, schema=self.schema)
+        self.writer.write_table(table)
+
+
+class GeoJSONStreamHandler(FeatureStreamHandler):
+    """Streams the tagged features of an OSM file into a GeoJSON file.
+
+    Features are selected as in ``FeatureStreamHandler`` and written as a
+    GeoJSON FeatureCollection with the same layout as ``osmium export``:
+    the attributes are ``@`` prefixed properties and tags that don't apply
+    to a feature are left out of its properties.
+    """
+
+    def __init__(self, path: Path, *args, **kwargs) -> None:
+        super().__init__(path, *args, **kwargs)
+        self.factory = osmium.geom.GeoJSONFactory()
+
+    def close(self) -> None:
+        """Writes the pending batch and closes the GeoJSON file."""
+        self._flush()
+        self.file.write("\n]}\n")
+        self.file.close()
+
+    def _open(self, path: Path) -> None:
+        # pylint: disable-next=consider-using-with
+        self.file = path.open("w", encoding="utf-8")
+        self.file.write('{"type": "FeatureCollection", "features": [\n')
+        self.separator = ""
+
+    def _write_batch(self) -> None:
+        names = self.schema.names[:-1]
+        for i, geometry in enumerate(self.batch["geometry"]):
+            properties = {
+                name: self.batch[name][i]
+                for name in names
+                if self.batch[name][i] is not None
+            }
+            self.file.write(
+                f'{self.separator}{{"type": "Feature", "geometry": {geometry}'
+                f', "properties": {json.dumps(properties)}}}'
+            )
+            self.separator = ",\n"
+
+
+class FeatureFanoutHandler(osmium.SimpleHandler):
+    """Runs several feature handlers on a single scan of an OSM file.
+
+    Args:
+        handlers (Sequence[FeatureStreamHandler]): the handlers to run.
+    """
+
+    def __init__(self, handlers: Sequence[FeatureStreamHandler]) -> None:
+        super().__init__()
+        self.handlers = handlers
+        for name in ("node", "way", "area"):
+            callbacks = [
+                getattr(handler, name)
+                for handler in handlers
+                if hasattr(handler, name)
+            ]
+            if callbacks:
+                setattr(self, name, self._fanout(callbacks))
+
+    def close(self) -> None:
+        """Closes all the handlers."""
+        for handler in self.handlers:
+            handler.close()
+
+    @staticmethod
+    def _fanout(callbacks: list) -> Any:
+        def callback(obj: Any) -> None:
+            for handler_callback in callbacks:
+                handler_callback(obj)
+
+        return callback
+
 
 @dataclass(kw_only=True)
 class GeoFile(ABC):
@@ -61,6 +402,10 @@ class GeoFile(ABC):
     def local_path(self) -> Path:
         """
         Returns the local path.
+
+        Subclasses cache the path on first access since it only depends on
+        fields that are set on creation. The DataDir root is already
+        resolved, so the path is absolute without resolving it again.
         """
 
     @property
@@ -109,20 +454,26 @@ class DownloadableGeoFile(GeoFile, ABC):
             )
             return self.local_path
 
-        with TqdmUpTo(
-            unit="B",
-            unit_scale=True,
-            unit_divisor=1024,
-            miniters=1,
-            desc=self._download_url.rsplit("/", maxsplit=1)[-1],
-        ) as t:
-            urlretrieve(
-                self._download_url,
-                self.local_path,
-                reporthook=t.update_to,
-                data=None,
-            )
-            t.total = t.n
+        with urlopen(self._download_url) as response:
+            total = int(response.headers.get("Content-Length", 0))
+            # reading in large chunks keeps the syscalls and progress bar
+            # updates low for files of hundreds of megabytes
+            buffer_size = max(8192, min(1 << 20, total // 1000 or 65536))
+            with (
+                open(self.local_path, "wb") as dst,
+                TqdmUpTo(
+                    total=total or None,
+                    unit="B",
+                    unit_scale=True,
+                    unit_divisor=1024,
+                    miniters=1,
+                    desc=self._download_url.rsplit("/", maxsplit=1)[-1],
+                ) as t,
+            ):
+                while chunk := response.read(buffer_size):
+                    dst.write(chunk)
+                    t.update(len(chunk))
+                t.total = t.n
 
         return self.local_path
 
@@ -147,11 +498,12 @@ class CountryGeoFile(GeoFile, ABC):
 
     def __post_init__(self):
         self.country_code = self.country_code.upper()
-        if self.country_code not in COUNTRYMAP:
+        names = COUNTRYMAP.get(self.country_code)
+        if names is None:
             raise KeyError(f"{self.country_code} is not a valid country code")
-        self._country_name = COUNTRYMAP[self.country_code][0]
-        self._continent = COUNTRYMAP[self.country_code][1]
-        self._proper_name = COUNTRYMAP[self.country_code][2]
+        self._country_name = names.country_name
+        self._continent = names.continent
+        self._proper_name = names.proper_name
 
     @property
     def country_name(self) -> str:
@@ -239,20 +591,123 @@ class ParquetFeatureFile(FeatureFile):
                 f"features must be one of {self.allowed_features}"
             )
 
-    @property
+    @cached_property
     def local_path(self) -> Path:
         return self.datadir.osm_parquet_dir.joinpath(
             f"{self.file_name}-{self.features}.parquet"
-        ).resolve()
+        )
 
-    def read_file(self) -> GeoDataFrame:
+    def read_file(
+        self,
+        columns: Optional[list[str]] = None,
+        geometry: bool = True,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+    ) -> GeoDataFrame | pd.DataFrame:
+        """Reads the parquet features.
+
+        Most of the reading time goes into decoding the WKB geometries, so
+        only the requested columns are read and the geometries can be
+        skipped altogether.
+
+        Args:
+            columns (Optional[list[str]], optional): the columns to read. If
+                None, all columns are read. Defaults to None.
+            geometry (bool, optional): whether to read the geometries. If
+                False, a plain DataFrame with the attributes is returned.
+                Defaults to True.
+            bbox (Optional[tuple[float, float, float, float]], optional): the
+                (minx, miny, maxx, maxy) bounds in EPSG:4326 of the features
+                to read. Row groups outside the bounds are skipped using the
+                bbox covering column. Only used when reading the geometries.
+                Defaults to None.
+
+        Returns:
+            GeoDataFrame | pd.DataFrame: the features in EPSG:4326, or only
+                their attributes if geometry is False.
+        """
         logger.info("Reading parquet features: %s", self.local_path)
-        gdf = gpd.read_parquet(self.local_path).to_crs(4326)
-        return gdf
+        if not geometry:
+            if columns is None:
+                schema = pq.read_schema(self.local_path)
+                geo = json.loads(schema.metadata.get(b"geo", b"{}"))
+                skip = set()
+                for name, meta in geo.get("columns", {}).items():
+                    skip.add(name)
+                    covering = meta.get("covering", {}).get("bbox", {})
+                    skip.update(path[0] for path in covering.values())
+                columns = [name for name in schema.names if name not in skip]
+            import pandas as pd
+
+            return pd.read_parquet(self.local_path, columns=columns)
+        import geopandas as gpd
+
+        gdf = gpd.read_parquet(self.local_path, columns=columns, bbox=bbox)
+        return self._to_wgs84(gdf)
 
     def write_file(self, gdf: GeoDataFrame) -> None:
         logger.info("Writing parquet features: %s", self.local_path)
-        gdf.to_parquet(self.local_path)
+        # the bbox covering column gives each row group bounds statistics,
+        # so reads with a bbox can skip the groups outside of it
+        gdf.to_parquet(
+            self.local_path,
+            compression=PARQUET_COMPRESSION,
+            write_covering_bbox=True,
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+        )
+
+    @classmethod
+    def read_dataset(
+        cls,
+        files: list[ParquetFeatureFile],
+        columns: Optional[list[str]] = None,
+        filters: Any = None,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+    ) -> GeoDataFrame:
+        """Reads the features of several files as a single GeoDataFrame.
+
+        The files are scanned as one pyarrow dataset, so the filters and the
+        bbox skip row groups in every file before anything is decoded, and
+        there is no per-file frame to concatenate afterwards.
+
+        Args:
+            files (list[ParquetFeatureFile]): the files to read, which must
+                share the same schema.
+            columns (Optional[list[str]], optional): the columns to read. If
+                None, all columns are read. Defaults to None.
+            filters (Any, optional): a pyarrow filter expression or a list of
+                (column, op, value) tuples, as taken by
+                pyarrow.parquet.read_table. Defaults to None.
+            bbox (Optional[tuple[float, float, float, float]], optional): the
+                (minx, miny, maxx, maxy) bounds in EPSG:4326 of the features
+                to read. Defaults to None.
+
+        Returns:
+            GeoDataFrame: the features of all the files in EPSG:4326.
+        """
+        paths = [str(file.local_path) for file in files]
+        logger.info("Reading parquet dataset of %d files", len(paths))
+        import geopandas as gpd
+
+        gdf = gpd.read_parquet(
+            paths, columns=columns, filters=filters, bbox=bbox
+        )
+        return cls._to_wgs84(gdf)
+
+    @staticmethod
+    def _to_wgs84(gdf: GeoDataFrame) -> GeoDataFrame:
+        """Returns the features in EPSG:4326.
+
+        Args:
+            gdf (GeoDataFrame): the features as read from a parquet file.
+
+        Returns:
+            GeoDataFrame: the features in EPSG:4326.
+        """
+        # files without a crs are lon/lat WGS84 (OGC:CRS84) by the GeoParquet
+        # spec, so they only need relabelling instead of a reprojection
+        if gdf.crs == "OGC:CRS84":
+            return gdf.set_crs(4326, allow_override=True)
+        return gdf.to_crs(4326)
 
 
 @dataclass
@@ -262,7 +717,7 @@ class GeoJSONFeatureFile(FeatureFile):
     geometry_type: str
     suffix: str
 
-    @property
+    @cached_property
     def local_path(self) -> Path:
         return self.datadir.osm_geojson_dir.joinpath(
             f"{self.file_name}-{self.geometry_type}-{self.suffix}.geojson"
@@ -270,12 +725,41 @@ class GeoJSONFeatureFile(FeatureFile):
 
     def read_file(self) -> GeoDataFrame:
         logger.info("Reading GeoJSON features: %s", self.local_path)
-        gdf = gpd.read_file(self.local_path)
+        import geopandas as gpd
+
+        # the arrow reader builds the columns without per-feature python
+        gdf = gpd.read_file(self.local_path, engine="pyogrio", use_arrow=True)
         return gdf
 
     def write_file(self, gdf: GeoDataFrame) -> None:
         logger.info("Writing GeoJSON features: %s", self.local_path)
-        gdf.to_file(self.local_path, driver="GeoJSON")
+        # pyogrio writes through GDAL in bulk, and is pinned so that an
+        # installed fiona is never picked up instead
+        gdf.to_file(self.local_path, driver="GeoJSON", engine="pyogrio")
+
+    def to_parquet(
+        self, path: Path, batch_size: int = PARQUET_ROW_GROUP_SIZE
+    ) -> Path:
+        """
+        Converts the GeoJSON file into a GeoParquet file.
+
+        The features are read and written in Arrow batches, so memory use is
+        bounded by the batch size instead of the size of the file, and no
+        GeoDataFrame is built. Each batch is a row group with the bounds of
+        its features in the bbox covering column, as in
+        `ParquetFeatureFile.write_file`.
+
+        Args:
+            path (Path): the path of the GeoParquet file to write.
+            batch_size (int, optional): number of features per batch.
+                Defaults to PARQUET_ROW_GROUP_SIZE.
+
+        Returns:
+            Path: the path of the GeoParquet file
+        """
+        logger.info("Converting GeoJSON features: %s", self.local_path)
+        convert_to_geoparquet(self.local_path, path, batch_size=batch_size)
+        return path
 
     @classmethod
     def from_path(cls, path: Path) -> GeoJSONFeatureFile:
@@ -323,13 +807,13 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
             ]
         )
 
-    @property
+    @cached_property
     def local_path(self) -> Path:
         return self.datadir.osm_pbf_dir.joinpath(
             "".join((self.file_name, ".osm.pbf"))
-        ).resolve()
+        )
 
-    @property
+    @cached_property
     def geojson_path(self) -> Path:
         """
         Returns the path to the geojson file. Whether the file exists or not.
@@ -339,7 +823,7 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
         """
         return self.datadir.osm_geojson_dir.joinpath(
             "".join((self.file_name, ".geojson"))
-        ).resolve()
+        )
 
     def remove(self) -> None:
         """
@@ -358,6 +842,7 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
         overwrite: bool = False,
         progress: bool = True,
         suffix: Optional[str] = None,
+        prefilter: bool = False,
     ) -> Path:
         """
         Exports the PBF file to the specified path as a GeoJSON file.
@@ -375,6 +860,10 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
             progress (bool, optional): Show progress. Defaults to True.
             suffix (Optional[str], optional): Suffix to add to the file name.
                 Defaults to None.
+            prefilter (bool, optional): Filter the PBF file down to the
+                objects matching `include_tags` before exporting it. It only
+                pays off when the tags match a small part of the file, since
+                the file is read twice. Defaults to False.
 
         Returns:
             Path: the path to the exported file in the local machine
@@ -385,12 +874,20 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
                 f"{self.local_path} does not exist, download it first"
             )
 
+        target = self._make_export_path(
+            geometry_type=geometry_type, suffix=suffix
+        )
+        config = self._export_config(attributes, include_tags, geometry_type)
+        if self._is_current_export(target, config, overwrite):
+            return target
+
         osmium_args = [
             "osmium",
             "export",
         ]
 
-        if overwrite:
+        # a stale export made with another configuration is replaced too
+        if overwrite or target.exists():
             osmium_args.append("-O")
 
         if progress:
@@ -398,32 +895,314 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
         else:
             osmium_args.append("--no-progress")
 
-        target = self._make_export_path(
-            geometry_type=geometry_type, suffix=suffix
-        )
-        if target.exists() and not overwrite:
-            logger.warning("%s already exists, skipping export", target)
-            return target
-
         if geometry_type is not None:
             osmium_args.append(f"--geometry-type={geometry_type}")
 
         osmium_args.extend(["-o", str(target)])
 
-        # not using context manager because it acts weird on Windows
-        tmpfile = NamedTemporaryFile(mode="w+", delete=False)
-        json.dump(self._build_json_config(attributes, include_tags), tmpfile)
-        tmpfile.flush()
+        # the config is closed before osmium opens it by name, since Windows
+        # does not allow opening a file that is still open for writing
+        tmpfile = NamedTemporaryFile(mode="w", suffix=".json", delete=False)
+        config_path = Path(tmpfile.name)
+        source = self.local_path
+        try:
+            with tmpfile:
+                json.dump(
+                    self._build_json_config(attributes, include_tags), tmpfile
+                )
+
+            # only the objects that can match the tags are assembled by export
+            if prefilter and include_tags:
+                source = self._tags_filter(include_tags, progress)
+
+            osmium_args.extend(["-c", str(config_path), str(source)])
+            self._run_osmium(osmium_args, progress)
+        finally:
+            config_path.unlink(missing_ok=True)
+            if source != self.local_path:
+                source.unlink(missing_ok=True)
+        self._record_export_config(target, config)
+
+        return target
+
+    def _tags_filter(self, include_tags: list[str], progress: bool) -> Path:
+        """
+        Filters the PBF file down to the objects matching any of the tags.
+
+        osmium tags-filter works on the raw objects without assembling their
+        geometries, and it keeps the nodes and members the matches refer to,
+        so exporting the much smaller result gives the same features. The
+        result is a temporary file since area exports read their input
+        twice and cannot take it from a pipe.
 
-        osmium_args.extend(["-c", tmpfile.name])
-        osmium_args.append(str(self.local_path))
+        Args:
+            include_tags (list[str]): list of osmium tag expressions.
+            progress (bool): Show progress.
 
-        run(osmium_args, check=True)
-        tmpfile.close()
-        Path(tmpfile.name).unlink()
+        Returns:
+            Path: the path to the filtered PBF file, to be removed by the
+                caller.
+        """
+        # the file is kept on close, so that osmium can open it by name
+        with NamedTemporaryFile(
+            dir=self.local_path.parent, suffix=".osm.pbf", delete=False
+        ) as tmpfile:
+            filtered = Path(tmpfile.name)
+
+        osmium_args = ["osmium", "tags-filter", "-O"]
+        osmium_args.append("--progress" if progress else "--no-progress")
+        osmium_args.extend(["-o", str(filtered), str(self.local_path)])
+        osmium_args.extend(include_tags)
+        try:
+            self._run_osmium(osmium_args, progress)
+        except BaseException:
+            filtered.unlink(missing_ok=True)
+            raise
+        return filtered
+
+    @staticmethod
+    def _run_osmium(osmium_args: list[str], progress: bool) -> None:
+        """
+        Runs an osmium command.
+
+        Without a progress bar osmium has nothing to show, so its output is
+        captured instead of written to the terminal shared by concurrent
+        exports, and logged if the command fails.
+
+        Args:
+            osmium_args (list[str]): the osmium command and its arguments.
+            progress (bool): whether osmium shows its progress bar.
+
+        Raises:
+            CalledProcessError: if osmium fails.
+        """
+        if progress:
+            run(osmium_args, check=True)
+            return
+        try:
+            run(
+                osmium_args, check=True, stdout=DEVNULL, stderr=PIPE, text=True
+            )
+        except CalledProcessError as exc:
+            logger.error("osmium %s failed: %s", osmium_args[1], exc.stderr)
+            raise
+
+    def export_stream(
+        self,
+        attributes: list[str],
+        include_tags: list[str],
+        geometry_type: Optional[str] = None,
+        overwrite: bool = False,
+        suffix: Optional[str] = None,
+        batch_size: int = 65536,
+    ) -> Path:
+        """
+        Exports the PBF file to the parquet directory as a GeoParquet file.
+
+        Unlike `export`, the features are filtered and written in-process by
+        a pyosmium handler in a single scan of the file, without the GeoJSON
+        intermediate. Tag filtering follows the osmium-tool semantics of
+        `export`.
+
+        Args:
+            attributes (list[str]): list of attributes to export from the PBF
+                file.
+            include_tags (list[str]): list of tags to include in the export.
+            geometry_type (Optional[str], optional): the geometry type to
+                export. Defaults to None, in which case al the geometries are
+                exported.
+            overwrite (bool, optional): Overwrite existing files. Defaults to
+                False.
+            suffix (Optional[str], optional): Suffix to add to the file name.
+                Defaults to None.
+            batch_size (int, optional): number of features per written batch.
+                Defaults to 65536.
+
+        Returns:
+            Path: the path to the exported file in the local machine
+        """
+        logger.info("Streaming (%s, %s)", self.country_code, self.proper_name)
+        if not self.local_path.exists():
+            raise FileNotFoundError(
+                f"{self.local_path} does not exist, download it first"
+            )
+
+        target = self.datadir.osm_parquet_dir.joinpath(
+            self._make_export_path(geometry_type, suffix).stem + ".parquet"
+        )
+        config = self._export_config(attributes, include_tags, geometry_type)
+        if self._is_current_export(target, config, overwrite):
+            return target
+
+        handler = FeatureStreamHandler(
+            target,
+            attributes=attributes,
+            include_tags=include_tags,
+            geometry_type=geometry_type,
+            batch_size=batch_size,
+        )
+        try:
+            handler.apply_file(str(self.local_path), locations=True)
+        finally:
+            handler.close()
+        self._record_export_config(target, config)
 
         return target
 
+    def export_multi(
+        self,
+        specs: list[dict[str, Any]],
+        overwrite: bool = False,
+        batch_size: int = 65536,
+    ) -> list[Path]:
+        """
+        Exports several feature sets of the PBF file in a single scan.
+
+        Each spec holds the `attributes`, `include_tags`, `geometry_type` and
+        `suffix` arguments of `export` and produces the same GeoJSON file,
+        but the features are written in-process by pyosmium handlers that
+        share one read of the file instead of one osmium run per spec.
+
+        Args:
+            specs (list[dict[str, Any]]): the export arguments of each file.
+            overwrite (bool, optional): Overwrite existing files. Defaults to
+                False.
+            batch_size (int, optional): number of features per written batch.
+                Defaults to 65536.
+
+        Returns:
+            list[Path]: the paths to the exported files, in the order of the
+                specs.
+        """
+        logger.info(
+            "Exporting %d feature sets (%s, %s)",
+            len(specs),
+            self.country_code,
+            self.proper_name,
+        )
+        if not self.local_path.exists():
+            raise FileNotFoundError(
+                f"{self.local_path} does not exist, download it first"
+            )
+
+        targets = []
+        configs = {}
+        handlers = []
+        for spec in specs:
+            target = self._make_export_path(
+                spec.get("geometry_type"), spec.get("suffix")
+            )
+            targets.append(target)
+            config = self._export_config(
+                spec["attributes"],
+                spec["include_tags"],
+                spec.get("geometry_type"),
+            )
+            if self._is_current_export(target, config, overwrite):
+                continue
+            configs[target] = config
+            handlers.append(
+                GeoJSONStreamHandler(
+                    target,
+                    attributes=spec["attributes"],
+                    include_tags=spec["include_tags"],
+                    geometry_type=spec.get("geometry_type"),
+                    batch_size=batch_size,
+                )
+            )
+
+        if handlers:
+            handler = FeatureFanoutHandler(handlers)
+            try:
+                handler.apply_file(str(self.local_path), locations=True)
+            finally:
+                handler.close()
+            for target, config in configs.items():
+                self._record_export_config(target, config)
+
+        return targets
+
+    @staticmethod
+    def _export_config(
+        attributes: list[str],
+        include_tags: list[str],
+        geometry_type: Optional[str],
+    ) -> dict[str, Any]:
+        """
+        Builds the record of the arguments that define an export.
+
+        Args:
+            attributes (list[str]): list of attributes to export.
+            include_tags (list[str]): list of tags to include in the export.
+            geometry_type (Optional[str]): the geometry type to export.
+
+        Returns:
+            dict[str, Any]: the export configuration
+        """
+        return {
+            "attributes": attributes,
+            "include_tags": include_tags,
+            "geometry_type": geometry_type,
+        }
+
+    @staticmethod
+    def _export_config_path(target: Path) -> Path:
+        """
+        Returns the path of the configuration recorded for an export.
+
+        Args:
+            target (Path): the path of the exported file
+
+        Returns:
+            Path: the path of the configuration file
+        """
+        return target.with_name(f"{target.name}.config.json")
+
+    def _is_current_export(
+        self, target: Path, config: dict[str, Any], overwrite: bool
+    ) -> bool:
+        """
+        Checks if an existing export can be reused instead of redone.
+
+        The export is reused unless it is overwritten or it was recorded with
+        a different configuration. Exports without a recorded configuration
+        are reused as they are.
+
+        Args:
+            target (Path): the path of the exported file
+            config (dict[str, Any]): the configuration of the export
+            overwrite (bool): Overwrite existing files.
+
+        Returns:
+            bool: whether the export can be reused
+        """
+        if overwrite or not target.exists():
+            return False
+        config_path = self._export_config_path(target)
+        if config_path.exists():
+            if json.loads(config_path.read_text()) != config:
+                logger.warning(
+                    "%s was exported with another configuration, exporting "
+                    "it again",
+                    target,
+                )
+                return False
+        logger.warning("%s already exists, skipping export", target)
+        return True
+
+    def _record_export_config(
+        self, target: Path, config: dict[str, Any]
+    ) -> None:
+        """
+        Records the configuration of an export next to the exported file.
+
+        Args:
+            target (Path): the path of the exported file
+            config (dict[str, Any]): the configuration of the export
+        """
+        if target.exists():
+            self._export_config_path(target).write_text(json.dumps(config))
+
     def _make_export_path(
         self, geometry_type: Optional[str], suffix: Optional[str] = None
     ) -> Path:
@@ -496,11 +1275,9 @@ class PBFFile(CountryGeoFile, DownloadableGeoFile):
 class DaylightFile(DownloadableGeoFile):
     """A daylights coastline file"""
 
-    @property
+    @cached_property
     def local_path(self) -> Path:
-        return self.datadir.daylight_dir.joinpath(
-            f"{self.file_name}.tar.gz"
-        ).resolve()
+        return self.datadir.daylight_dir.joinpath(f"{self.file_name}.tar.gz")
 
     @property
     def _base_url(self) -> str:
@@ -520,16 +1297,80 @@ class DaylightFile(DownloadableGeoFile):
     def download(self, overwrite: bool = False) -> Path:
         return self._download_file_url(overwrite=overwrite)
 
+    @cached_property
+    def parquet_path(self) -> Path:
+        """
+        Returns the path to the GeoParquet copy of the water polygons.
+
+        Returns:
+            Path: the path to the GeoParquet file
+        """
+        return self.datadir.daylight_dir.joinpath(
+            f"{self.file_name}-water.parquet"
+        )
+
     def get_coastline(self, bbox: tuple | None = None) -> GeoDataFrame:
-        """Loads the coastline from the daylight tar file.
+        """Loads the coastline water polygons.
+
+        Reading the shapefile from the tar file decompresses the archive on
+        every call, so the polygons are read from a GeoParquet copy that is
+        written on first use. The copy has a bbox covering column, so reads
+        with a bbox skip the row groups outside of it without decoding their
+        geometries.
 
         Args:
             bbox (tuple[float] | None, optional): the bounding box to load.
                 Defaults to None, in which case the whole file is loaded.
         """
         if bbox is None:
-            return gpd.read_file(f"tar://{self.local_path}!water_polygons.shp")
-        return gpd.read_file(
-            f"tar://{self.local_path}!water_polygons.shp",
-            bbox=bbox,
+            logger.warning(
+                "Loading the global coastline file, pass a bbox to load "
+                "only the region of interest"
+            )
+        if not self._is_current_parquet():
+            self._write_parquet()
+        import geopandas as gpd
+
+        return gpd.read_parquet(self.parquet_path, bbox=bbox)
+
+    def _is_current_parquet(self) -> bool:
+        """
+        Checks if the GeoParquet copy was written after the last download.
+
+        A copy is always current once the tar file has been removed.
+
+        Returns:
+            bool: whether the copy can be used
+        """
+        if not self.parquet_path.exists():
+            return False
+        if not self.local_path.exists():
+            return True
+        return (
+            self.parquet_path.stat().st_mtime
+            >= self.local_path.stat().st_mtime
         )
+
+    def _write_parquet(self) -> Path:
+        """
+        Converts the water polygons shapefile into a GeoParquet file.
+
+        The polygons are streamed in Arrow batches, one row group each, and
+        their bounds are written to the bbox covering column. The file is
+        written under a temporary name first, so an interrupted conversion
+        is never taken for a current one.
+
+        Returns:
+            Path: the path to the GeoParquet file
+        """
+        logger.info("Converting the coastline file: %s", self.local_path)
+        # concurrent normalizers may convert the file at the same time
+        tmp_path = self.parquet_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            convert_to_geoparquet(
+                f"tar://{self.local_path}!water_polygons.shp", tmp_path
+            )
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path.replace(self.parquet_path)
@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 
 import geopandas as gpd
+import numpy as np
 from geopandas.geodataframe import GeoDataFrame
 
 from geopull.directories import DataDir
@@ -13,6 +14,7 @@ from geopull.geofile import (
     GeoJSONFeatureFile,
     ParquetFeatureFile,
 )
+from geopull.geometry import mercator_area
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +41,6 @@ class GeopullNormalizer(Normalizer):
     """
 
     datadir: DataDir = field(default=DataDir("."), repr=False)
-    _dldf: GeoDataFrame = field(init=False, repr=False)
     dl: DaylightFile = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
@@ -63,8 +64,9 @@ class GeopullNormalizer(Normalizer):
         adminp = ParquetFeatureFile(admin.country_code, "admin")
         adminp.write_file(admin.gdf)
 
+        # the linestrings are only converted, without loading them whole
         linesp = ParquetFeatureFile(linestring.country_code, "linestring")
-        linesp.write_file(linestring.gdf)
+        linestring.to_parquet(linesp.local_path)
 
     def _normalize_admin(self, admin: GeoJSONFeatureFile) -> None:
         """Edits the admin features from OSM data
@@ -85,9 +87,9 @@ class GeopullNormalizer(Normalizer):
 
         admin_lvls = gdf["admin_level"].unique()
         if 4 in admin_lvls:
-            gdf["area"] = gdf.to_crs(3395).area
-            admin_areas = gdf.groupby("admin_level")["area"].sum()
-            if admin_areas.loc[4] >= admin_areas.loc[2]:
+            area = mercator_area(gdf.geometry.values)
+            level = gdf["admin_level"].to_numpy()
+            if area[level == 4].sum() >= area[level == 2].sum():
                 gdf = gdf[gdf["admin_level"] == 4]
             else:
                 gdf = gdf[gdf["admin_level"] == 2]
@@ -107,20 +109,17 @@ class GeopullNormalizer(Normalizer):
         """
         gdf = admin.gdf
         dldf = self._get_coastlines(admin, self.dl)
-        intersected = gpd.sjoin(
-            left_df=gdf,
-            right_df=dldf,
-            predicate="intersects",
-            how="inner",
-        )
-        if len(intersected) > 0:
+        # only the coastline polygons that intersect the country change the
+        # difference, so the overlay is limited to them
+        _, hits = dldf.sindex.query(gdf.geometry, predicate="intersects")
+        if len(hits) > 0:
             logger.info(
                 "Normalizing %s by removing maritime boundary and EEZ",
                 admin.country_code,
             )
             gdf = gpd.overlay(
                 df1=gdf,
-                df2=dldf,
+                df2=dldf.iloc[np.unique(hits)],
                 how="difference",
                 keep_geom_type=True,
                 make_valid=True,
@@ -163,11 +162,10 @@ class GeopullNormalizer(Normalizer):
         """Get the coastline for the given country.
 
         The coastline file is very large so we only load the part of the file
-        that corresponds to the bounding box of the country using the
-        .bounds() GeoDataFrame method.
+        that corresponds to the bounding box of the country. The total bounds
+        of the features are the bounds of their union, without having to
+        dissolve them.
         """
         logger.info("Getting coastline for %s", admin.country_code)
-        dldf = dl.get_coastline(
-            bbox=tuple(*admin.gdf.dissolve().bounds.values)
-        )
+        dldf = dl.get_coastline(bbox=tuple(admin.gdf.total_bounds))
         return dldf
@@ -1,22 +1,64 @@
 """Orchestration logic for geopull."""
+from __future__ import annotations
+
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import partial
 from multiprocessing import Pool
-from typing import Callable, Iterable
+from operator import methodcaller
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
 
 from tqdm import tqdm
 from tqdm.contrib.logging import logging_redirect_tqdm
 
 from geopull.directories import DataDir
 from geopull.extractor import Extractor
-from geopull.geofile import GeoJSONFeatureFile, PBFFile
-from geopull.normalizer import Normalizer
-from geopull.blocker import GeoPullBlocker
+from geopull.geofile import PARQUET_COMPRESSION, GeoJSONFeatureFile, PBFFile
+
+# the normalizer and the blocker load geopandas, so they are only imported by
+# the steps that use them
+if TYPE_CHECKING:
+    from geopull.normalizer import Normalizer
 
 logger = logging.getLogger(__name__)
 
 
+def _share_osmium_threads(threads: int) -> None:
+    """Caps the libosmium thread pool of a worker process.
+
+    Both pyosmium and the osmium-tool subprocesses read this variable, so
+    concurrent workers split the CPUs instead of each using all of them.
+
+    Args:
+        threads (int): the number of threads of the pool.
+    """
+    os.environ["OSMIUM_POOL_THREADS"] = str(threads)
+
+
+def _normalize_country(normalizer: Normalizer, country: str) -> None:
+    """Normalizes the extracted features of a country.
+
+    Args:
+        normalizer (Normalizer): the normalizer to use.
+        country (str): the ISO3 country code.
+    """
+    admin = GeoJSONFeatureFile(
+        country_code=country, geometry_type="polygon", suffix="admin"
+    )
+    water = GeoJSONFeatureFile(
+        country_code=country, geometry_type="polygon", suffix="water"
+    )
+    linestring = GeoJSONFeatureFile(
+        country_code=country,
+        geometry_type="linestring",
+        suffix="linestring",
+    )
+    normalizer.normalize(admin=admin, water=water, linestring=linestring)
+
+
 @dataclass
 class Orchestrator:
     """Orchestrates the geopull process."""
@@ -27,68 +69,161 @@ class Orchestrator:
 
     def __post_init__(self) -> None:
         self.pbfs = [
-            PBFFile(country_code=country) for country in self.countries
+            PBFFile(country_code=country, datadir=self.datadir)
+            for country in self.countries
         ]
 
-    def download(self) -> None:
-        """Downloads the OSM files for the given countries."""
-        for file in self.pbfs:
-            file.download()
+    def download(self, max_workers: int = 4) -> None:
+        """Downloads the OSM files for the given countries.
+
+        Downloads are network bound, so they run concurrently on a thread
+        pool. The pool size also caps the number of simultaneous connections
+        made to the Geofabrik server.
 
-    def extract(self, extractor: Extractor) -> None:
+        Args:
+            max_workers (int, optional): the maximum number of concurrent
+                downloads. Defaults to 4.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            tuple(executor.map(methodcaller("download"), self.pbfs))
+
+    def export(
+        self,
+        attributes: list[str],
+        include_tags: list[str],
+        geometry_type: Optional[str] = None,
+        overwrite: bool = False,
+        stream: bool = False,
+    ) -> list[Path]:
+        """Exports the OSM files for the given countries into GeoJSON files.
+
+        Each export runs in its own osmium subprocess, so a thread pool is
+        enough to run them concurrently. The osmium progress bar is only
+        shown when a single country is exported since concurrent bars would
+        interleave. With `stream` the features are written to GeoParquet
+        files by `PBFFile.export_stream` instead, whose pyosmium handler
+        runs in Python and holds the GIL, so the countries are streamed in
+        worker processes.
+
+        Args:
+            attributes (list[str]): list of attributes to export from the PBF
+                files.
+            include_tags (list[str]): list of tags to include in the export.
+            geometry_type (Optional[str], optional): the geometry type to
+                export. Defaults to None, in which case all the geometries
+                are exported.
+            overwrite (bool, optional): Overwrite existing files. Defaults to
+                False.
+            stream (bool, optional): Stream the features into GeoParquet
+                files with pyosmium. Defaults to False.
+
+        Returns:
+            list[Path]: the paths to the exported files.
+        """
+        kwargs = {
+            "attributes": attributes,
+            "include_tags": include_tags,
+            "geometry_type": geometry_type,
+            "overwrite": overwrite,
+        }
+        ncpu = os.cpu_count() or 1
+        max_workers = min(len(self.pbfs), ncpu)
+        if not stream:
+            exporter = methodcaller(
+                "export", progress=len(self.pbfs) == 1, **kwargs
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(exporter, self.pbfs))
+
+        exporter = methodcaller("export_stream", **kwargs)
+        if max_workers <= 1:
+            return [exporter(file) for file in self.pbfs]
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_share_osmium_threads,
+            initargs=(max(1, ncpu // max_workers),),
+        ) as executor:
+            return list(executor.map(exporter, self.pbfs))
+
+    def extract(
+        self, extractor: Extractor, max_workers: Optional[int] = None
+    ) -> None:
         """Extracts features from the OSM files for the given countries.
 
+        The countries are extracted concurrently in worker processes, since
+        the single pass extraction runs its pyosmium handlers in Python and
+        holds the GIL. A single country is extracted in this process.
+
         Args:
             extractor (Extractor): the extractor to use.
+            max_workers (Optional[int], optional): the maximum number of
+                countries extracted at once. Defaults to None, in which case
+                the number of CPUs is used.
         """
-        for file in self.pbfs:
-            extractor.extract(file)
-
-    def normalize(self, normalizer: Normalizer) -> None:
+        ncpu = os.cpu_count() or 1
+        max_workers = min(len(self.pbfs), max_workers or ncpu)
+        if max_workers <= 1:
+            for file in self.pbfs:
+                extractor.extract(file)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_share_osmium_threads,
+            initargs=(max(1, ncpu // max_workers),),
+        ) as executor:
+            tuple(executor.map(extractor.extract, self.pbfs))
+
+    def normalize(
+        self, normalizer: Normalizer, max_workers: Optional[int] = None
+    ) -> None:
         """Normalizes the extracted features.
 
+        The countries are normalized concurrently in worker processes, since
+        the dissolves and overlays are CPU bound and hold the GIL. A single
+        country is normalized in this process.
+
         Args:
             normalizer (Normalizer): the normalizer to use.
+            max_workers (Optional[int], optional): the maximum number of
+                countries normalized at once. Each worker holds the features
+                of a whole country in memory. Defaults to None, in which
+                case the number of CPUs is used.
         """
-        admin_files = []
-        water_files = []
-        for country in self.countries:
-            admin_files.append(
-                GeoJSONFeatureFile(
-                    country_code=country,
-                    geometry_type="polygon",
-                    suffix="admin",
-                )
-            )
-            water_files.append(
-                GeoJSONFeatureFile(
-                    country_code=country,
-                    geometry_type="polygon",
-                    suffix="water",
-                )
-            )
+        normalize_country = partial(_normalize_country, normalizer)
+        ncpu = os.cpu_count() or 1
+        max_workers = min(len(self.countries), max_workers or ncpu)
+        if max_workers <= 1:
+            for country in self.countries:
+                normalize_country(country)
+            return
 
-        for country in self.countries:
-            admin = GeoJSONFeatureFile(
-                country_code=country, geometry_type="polygon", suffix="admin"
-            )
-            water = GeoJSONFeatureFile(
-                country_code=country, geometry_type="polygon", suffix="water"
-            )
-            linestring = GeoJSONFeatureFile(
-                country_code=country,
-                geometry_type="linestring",
-                suffix="linestring",
-            )
-            normalizer.normalize(
-                admin=admin, water=water, linestring=linestring
-            )
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            tuple(executor.map(normalize_country, self.countries))
 
     def block(self) -> None:
-        for country in self.countries:
-            blocker = GeoPullBlocker(region_code=country)
-            blocks = blocker.build_blocks()
-            blocks.to_parquet(self.datadir.blocks_dir / f"{country}.parquet")
+        """Builds and writes the blocks of the given countries.
+
+        The blocks of a country are written by a background thread, so the
+        parquet encoding overlaps with blocking the next country.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from geopull.blocker import GeoPullBlocker
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            writes = []
+            for country in self.countries:
+                blocker = GeoPullBlocker(region_code=country)
+                blocks = blocker.build_blocks()
+                writes.append(
+                    writer.submit(
+                        blocks.to_parquet,
+                        self.datadir.blocks_dir / f"{country}.parquet",
+                        compression=PARQUET_COMPRESSION,
+                    )
+                )
+            for write in writes:
+                write.result()
 
     def _pool_mapper(self, func: Callable, iterable: Iterable) -> None:
         ncpu = os.cpu_count()
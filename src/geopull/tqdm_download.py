@@ -5,8 +5,7 @@ Created on 2022-12-29 04:38:25-05:00
 @filename:  tqdm_download.py
 @author:    Manuel Martinez (manmart@uchicago.edu)
 @project:   geopull
-@purpose:   simple tqdm progress bar to work with urlretrieve for downloading
-            files.
+@purpose:   simple tqdm progress bar for downloading files.
 ===============================================================================
 """
 
@@ -1,14 +1,21 @@
+import logging
 from unittest.mock import MagicMock, patch
 
+import geopandas as gpd
+import numpy as np
 import pytest
+import shapely
 from geopandas import GeoDataFrame
 from geopull.blocker import (
     Blocker,
     GeoPullBlocker,
     MultiLineString,
     MultiPolygon,
+    _encode_geohash,
+    _quantize,
+    _read_country_features,
 )
-from shapely.geometry import LineString, Polygon
+from shapely.geometry import GeometryCollection, LineString, Polygon, box
 
 
 @pytest.fixture
@@ -95,6 +102,7 @@ class TestBlockerInit:
         assert blocker.region_code == "test"
         assert blocker.land_df.crs == 4326
         assert blocker.line_df.crs == 4326
+        assert blocker._land_area == blocker.land_df.to_crs(3395).area.sum()
 
     def test_post_init_same_crs(
         self, land_df: GeoDataFrame, line_df: GeoDataFrame
@@ -105,6 +113,10 @@ class TestBlockerInit:
         assert blocker.land_df.crs == 4326
         assert blocker.line_df.crs == 4326
 
+    def test_cached_enclosure(self, blocker: Blocker):
+        assert isinstance(blocker._land_enclosure, MultiLineString)
+        assert blocker._land_enclosure is blocker._land_enclosure
+
 
 class TestBlockerMethods:
     @patch.object(Blocker, "_make_blocks", MagicMock())
@@ -125,6 +137,57 @@ class TestBlockerMethods:
         blocker._residual_area_check.assert_called_once()
         blocker._geohash_blocks.assert_called_once()
 
+    def test_build_blocks_tiled(self):
+        land_df = GeoDataFrame(
+            geometry=[
+                box(0, 0, 0.1, 0.1).difference(box(0.04, 0.04, 0.06, 0.06))
+            ],
+            crs=4326,
+        )
+        line_df = GeoDataFrame(
+            {"highway": ["primary", "secondary", "primary"]},
+            geometry=[
+                LineString([(-0.01, 0.03), (0.11, 0.07)]),
+                LineString([(0.02, -0.01), (0.08, 0.11)]),
+                LineString([(0.05, 0.0), (0.05, 0.04)]),
+            ],
+            crs=4326,
+        )
+        blocks = Blocker("test", land_df.copy(), line_df).build_blocks()
+        tiled = Blocker("test", land_df.copy(), line_df).build_blocks(
+            tile_precision=5
+        )
+        assert len(tiled) == len(blocks)
+        for geom in blocks.geometry:
+            overlap = shapely.intersection(tiled.geometry.values, geom)
+            assert shapely.area(overlap).max() == pytest.approx(geom.area)
+
+    def test_geohash_tiles(self):
+        tree = shapely.STRtree([box(0.01, 0.01, 0.05, 0.03)])
+        tiles = Blocker._geohash_tiles(tree, tile_precision=5)
+        assert len(tiles) == 2
+        assert shapely.equals(tiles[0], box(0, 0, 0.0439453125, 0.0439453125))
+
+    def test_merge_tile_edges(self, blocker: Blocker):
+        tiles = np.array([box(0, 0, 1, 1), box(1, 0, 2, 1)])
+        blocks = GeoDataFrame(
+            {
+                "code": "test",
+                "_tile": [0, 0, 1, 1],
+                "geometry": [
+                    box(0.5, 0, 1, 0.5),
+                    box(0.5, 0.5, 1, 1),
+                    box(1, 0, 1.5, 0.5),
+                    box(1, 0.5, 1.5, 1),
+                ],
+            },
+            crs=4326,
+        )
+        merged = blocker._merge_tile_edges(blocks, tiles)
+        assert len(merged) == 2
+        assert "_tile" not in merged.columns
+        assert merged.geometry.geom_equals(box(0.5, 0, 1.5, 0.5)).any()
+
     def test_remove_overlaps_no_overlap(self, blocker: Blocker):
         blocks = GeoDataFrame(
             {
@@ -153,6 +216,108 @@ class TestBlockerMethods:
         blocks = blocker._remove_overlaps(blocks)
         assert blocks.shape[0] == 1
 
+    def test_remove_overlaps_unresolved(self, blocker: Blocker, caplog):
+        blocks = GeoDataFrame(
+            {
+                "geometry": [
+                    box(0, 0, 1, 1),
+                    box(0.5, 0, 1.5, 1),
+                    box(3, 3, 4, 4),
+                    box(5, 5, 6, 6),
+                ]
+            }
+        ).set_crs(4326)
+        pairs = Blocker._overlapping_pairs(blocks.geometry.to_numpy())
+        with patch.object(
+            Blocker,
+            "_overlapping_pairs",
+            side_effect=[pairs, np.array([[0, 1], [1, 0]])],
+        ):
+            with caplog.at_level(logging.DEBUG, logger="geopull.blocker"):
+                blocker._remove_overlaps(blocks)
+        assert "2 blocks remain overlapping." in caplog.text
+        assert "Unresolved intersection area" in caplog.text
+
+        caplog.clear()
+        with (
+            patch.object(
+                Blocker,
+                "_overlapping_pairs",
+                side_effect=[pairs, np.array([[0, 1], [1, 0]])],
+            ),
+            patch("geopull.blocker.shapely.intersection") as intersection,
+        ):
+            with caplog.at_level(logging.WARNING, logger="geopull.blocker"):
+                blocker._remove_overlaps(blocks)
+        assert "2 blocks remain overlapping." in caplog.text
+        assert "Unresolved intersection area" not in caplog.text
+        intersection.assert_not_called()
+
+    def test_tiled_overlay(self):
+        df1 = GeoDataFrame(
+            {"value": range(20)},
+            geometry=[box(i, i % 3, i + 1.5, i % 3 + 1) for i in range(20)],
+            crs=4326,
+        )
+        df2 = GeoDataFrame(
+            geometry=[box(i, 0, i + 0.5, 5) for i in range(0, 22, 2)],
+            crs=4326,
+        )
+        expected = gpd.overlay(
+            df1, df2, how="intersection", keep_geom_type=True, make_valid=True
+        )
+        result = Blocker._tiled_overlay(df1, df2)
+        assert result["value"].tolist() == expected["value"].tolist()
+        assert result.geom_equals(expected).all()
+
+    def test_tiled_overlay_empty(self):
+        df = GeoDataFrame(geometry=[box(0, 0, 1, 1)], crs=4326)
+        result = Blocker._tiled_overlay(df.iloc[:0], df)
+        assert len(result) == 0
+
+    def test_difference(self):
+        geoms = np.array([box(0, 0, 2, 2), box(5, 5, 6, 6), box(8, 8, 9, 9)])
+        others = np.array([box(1, 0, 3, 2), box(0, 1, 3, 3), box(8, 8, 9, 9)])
+        result = Blocker._difference(geoms, others)
+        assert len(result) == 2
+        assert shapely.equals(result[0], box(0, 0, 1, 1))
+        assert shapely.equals(result[1], box(5, 5, 6, 6))
+
+    def test_dissolve_groups(self):
+        df = GeoDataFrame(
+            {"code": ["a", "b", "c", "d", "e", "f"]},
+            geometry=[
+                box(0, 0, 1, 1),
+                box(5, 5, 6, 6),
+                box(1, 0, 2, 1),
+                box(5, 6, 6, 7),
+                box(2, 0, 3, 1),
+                box(5, 7, 6, 8),
+            ],
+        )
+        result = Blocker._dissolve_groups(df, np.array([3, 1, 3, 1, 3, 1]))
+        assert result.index.tolist() == [1, 3]
+        assert result["code"].tolist() == ["b", "a"]
+        assert shapely.equals(result.geometry.iloc[0], box(5, 5, 6, 8))
+        assert shapely.equals(result.geometry.iloc[1], box(0, 0, 3, 1))
+        pairs = Blocker._dissolve_groups(df.iloc[:2], np.array([0, 0]))
+        assert shapely.equals(
+            pairs.geometry.iloc[0],
+            shapely.union(box(0, 0, 1, 1), box(5, 5, 6, 6)),
+        )
+
+    def test_overlapping_pairs(self):
+        geoms = np.array(
+            [
+                box(0, 0, 2, 2),
+                box(3, 3, 4, 4),
+                box(1, 1, 3, 3),
+                box(0, 0, 1, 1),
+            ]
+        )
+        pairs = Blocker._overlapping_pairs(geoms)
+        assert pairs.tolist() == [[0, 2], [2, 0]]
+
     def test_residual_area_check(
         self, blocker: Blocker, blocks_df: GeoDataFrame
     ):
@@ -162,6 +327,7 @@ class TestBlockerMethods:
             blocks_df.to_crs(3857).area.sum()
             <= blocker.land_df.to_crs(3857).area.sum()
         )
+        assert (blocks_df["code"] == blocker.region_code).all()
 
     def test_residual_area_check_no_residue(self, blocker: Blocker):
         blocks_df = GeoDataFrame(
@@ -213,44 +379,133 @@ class TestBlockerMethods:
     @patch("shapely.normalize", MagicMock())
     @patch("shapely.get_parts", MagicMock())
     @patch("shapely.make_valid", MagicMock())
+    @patch("shapely.is_valid", MagicMock())
     def test_polygonize(
         self, blocker: Blocker, land: MultiPolygon, line: MultiLineString
     ):
         result = blocker._polygonize(land, line)
         assert result is not None
 
+    def test_polygonize_faces(self, blocker: Blocker):
+        land = MultiLineString([box(0, 0, 2, 1).exterior])
+        line = MultiLineString([LineString([(1, -1), (1, 2)])])
+        result = blocker._polygonize(land, line)
+        assert len(result) == 2
+        assert shapely.is_valid(result).all()
+        assert shapely.area(result).tolist() == [1, 1]
+
     def test_validate(self, land_df: GeoDataFrame):
         valid_df = Blocker._validate(land_df)
         assert land_df.equals(valid_df)
 
+    def test_validate_parts(self):
+        gdf = GeoDataFrame(
+            {
+                "code": ["a", "b"],
+                "geometry": [
+                    Polygon([(0, 0), (1, 1), (1, 0), (0, 1)]),
+                    GeometryCollection(
+                        [box(5, 5, 6, 6), LineString([(0, 0), (1, 1)])]
+                    ),
+                ],
+            },
+            crs=4326,
+        )
+        valid_df = Blocker._validate(gdf)
+        assert valid_df.index.tolist() == [0, 0, 1]
+        assert valid_df["code"].tolist() == ["a", "a", "b"]
+        assert (valid_df.geom_type == "Polygon").all()
+        assert valid_df.is_valid.all()
+        assert valid_df.crs == 4326
+
+    def test_polygon_parts(self):
+        gdf = GeoDataFrame(
+            {
+                "code": ["a", "b", "c"],
+                "geometry": [
+                    MultiPolygon([box(0, 0, 1, 1), box(2, 2, 3, 3)]),
+                    LineString([(0, 0), (1, 1)]),
+                    box(5, 5, 6, 6),
+                ],
+            },
+            index=[3, 4, 5],
+            crs=4326,
+        )
+        parts = Blocker._polygon_parts(gdf)
+        assert parts.index.tolist() == [3, 3, 5]
+        assert parts["code"].tolist() == ["a", "a", "c"]
+        assert (parts.geom_type == "Polygon").all()
+        assert parts.crs == 4326
+
     def test_geohash_blocks(self, blocks_df: GeoDataFrame):
         geohashed = Blocker._geohash_blocks(blocks=blocks_df, precision=1)
         assert "block_id" in geohashed.columns
         assert geohashed["block_id"].nunique() > 1
 
+    @pytest.mark.parametrize(
+        "precision,expected", [(1, "u"), (5, "u4pru"), (11, "u4pruydqqvj")]
+    )
+    def test_encode_geohash(self, precision: int, expected: str):
+        geohashes = _encode_geohash(
+            lats=np.array([57.64911, 0.0]),
+            lons=np.array([10.40744, 0.0]),
+            precision=precision,
+        )
+        assert geohashes[0] == expected
+        assert geohashes[1] == "s" + "0" * (precision - 1)
+
+    @pytest.mark.parametrize("precision", [0, 13])
+    def test_encode_geohash_bad_precision(self, precision: int):
+        with pytest.raises(ValueError):
+            _encode_geohash(
+                lats=np.array([57.64911]),
+                lons=np.array([10.40744]),
+                precision=precision,
+            )
+
+    def test_quantize(self):
+        coords = np.array([-180.0, -90.0, np.nextafter(0.0, -1), 0.0, 180.0])
+        cells = _quantize(coords, bits=2, limit=180.0)
+        assert cells.tolist() == [0, 1, 1, 2, 3]
+
     def test_merge_land_lines(
         self, blocker: Blocker, land: MultiPolygon, line: MultiLineString
     ):
-        with (
-            patch("shapely.intersection_all") as ia,
-            patch("shapely.line_merge") as lm,
-        ):
-            blocker._merge_land_lines(land, line)
-            ia.assert_called_once()
-            lm.assert_called_once()
+        merged = blocker._merge_land_lines(land, line)
+        assert merged.length == pytest.approx(line.length)
+
+    def test_merge_land_lines_clipped(self, blocker: Blocker):
+        land = MultiPolygon([box(0, 0, 1, 1), box(2, 0, 3, 1)])
+        line = MultiLineString(
+            [LineString([(-1, 0.5), (4, 0.5)]), LineString([(5, 5), (6, 6)])]
+        )
+        merged = blocker._merge_land_lines(land, line)
+        assert isinstance(merged, MultiLineString)
+        assert merged.length == pytest.approx(2)
+
+    def test_merge_land_lines_inside(self, blocker: Blocker):
+        land = np.array([box(0, 0, 4, 4)])
+        line = np.array(
+            [
+                LineString([(1, 1), (2, 1), (3, 2)]),
+                LineString([(2, 2), (2, 6)]),
+            ]
+        )
+        with patch("shapely.intersection", wraps=shapely.intersection) as i:
+            merged = blocker._merge_land_lines(land, line)
+        assert len(i.call_args.args[0]) == 1
+        assert merged.length == pytest.approx(line[0].length + 2)
 
     def test_get_land_enclosure(self, blocker: Blocker, land: MultiPolygon):
         with (
             patch("shapely.get_parts") as cp,
             patch("shapely.get_exterior_ring") as ger,
             patch("shapely.multilinestrings") as mls,
-            patch("shapely.line_merge") as lm,
         ):
             blocker._get_land_enclosure(land)
             cp.assert_called_once()
             ger.assert_called_once()
             mls.assert_called_once()
-            lm.assert_called_once()
 
 
 class TestGeoPullBlocker:
@@ -263,3 +518,17 @@ class TestGeoPullBlocker:
     def test_creation(self, region_code: str):
         blocker = GeoPullBlocker(region_code=region_code)
         assert blocker is not None
+
+    @patch("geopull.blocker.ParquetFeatureFile")
+    def test_features_cached(self, mock_parq: MagicMock):
+        _read_country_features.cache_clear()
+        GeoPullBlocker(region_code="USA")
+        GeoPullBlocker(region_code="usa")
+        read_file = mock_parq.return_value.read_file
+        assert read_file.call_count == 2
+
+        # the files are read again once they are written again
+        mock_parq.return_value.local_path.stat.return_value.st_mtime_ns = 1
+        GeoPullBlocker(region_code="USA")
+        _read_country_features.cache_clear()
+        assert read_file.call_count == 4
@@ -34,6 +34,15 @@ class TestDataDir:
             assert getattr(data_dir, attr).exists()
             assert getattr(data_dir, attr).is_dir()
 
+    @staticmethod
+    def test_init_creates_tree(tmp_path):
+        DataDir(tmp_path)
+        data = tmp_path.joinpath("data")
+        for subdir in ("pbf", "geojson", "parquet"):
+            assert data.joinpath("osm", subdir).is_dir()
+        assert data.joinpath("daylight").is_dir()
+        assert data.joinpath("blocks").is_dir()
+
     @staticmethod
     def test_init_not_exists(tmp_path):
         with pytest.raises(FileNotFoundError):
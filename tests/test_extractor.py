@@ -1,14 +1,58 @@
 # pylint: disable=import-outside-toplevel,missing-function-docstring,
 # pylint: disable=unused-import, protected-access,missing-class-docstring
 
+import shutil
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import geopandas as gpd
+import osmium
 import pytest
 
+from geopull.directories import DataDir
 from geopull.extractor import Extractor, GeopullExtractor
 from geopull.geofile import PBFFile
 
 
+@pytest.fixture
+def osm_pbf(tmp_path: Path) -> PBFFile:
+    pbf = PBFFile(country_code="USA", datadir=DataDir(str(tmp_path)))
+    writer = osmium.SimpleWriter(str(pbf.local_path))
+    grid = [(x, y) for y in range(3) for x in range(3)]
+    for osm_id, location in enumerate(grid, 1):
+        writer.add_node(
+            osmium.osm.mutable.Node(
+                id=osm_id,
+                location=location,
+                version=1,
+                changeset=1,
+                timestamp="2020-01-01T00:00:00Z",
+            )
+        )
+    ways = [
+        (10, [1, 3, 9, 7, 1], {"admin_level": "2", "boundary": "maritime"}),
+        (11, [1, 2, 5, 4, 1], {"natural": "water"}),
+        (12, [2, 3, 6, 5, 2], {"admin_level": "8"}),
+        (13, [4, 5, 6], {"highway": "primary"}),
+        (14, [7, 8], {"highway": "footway"}),
+        (15, [8, 5, 2], {"waterway": "river"}),
+        (16, [4, 8], {"natural": "coastline"}),
+    ]
+    for osm_id, nodes, tags in ways:
+        writer.add_way(
+            osmium.osm.mutable.Way(
+                id=osm_id,
+                nodes=nodes,
+                tags=tags,
+                version=1,
+                changeset=1,
+                timestamp="2020-01-01T00:00:00Z",
+            )
+        )
+    writer.close()
+    return pbf
+
+
 def test_subclass_interface():
     subclasses = Extractor.__subclasses__()
     for subclass in subclasses:
@@ -28,10 +72,38 @@ class TestGeopullExtractor:
     @patch.object(GeopullExtractor, "_extract_admin", MagicMock())
     @patch("geopull.extractor.PBFFile")
     def test_extract(self, pbf, extractor):
-        extractor.extract(pbf)
+        results = extractor.extract(pbf)
         extractor._extract_water.assert_called_once_with(pbf)
         extractor._extract_linestring.assert_called_once_with(pbf)
         extractor._extract_admin.assert_called_once_with(pbf)
+        assert results == [
+            extractor._extract_water.return_value,
+            extractor._extract_linestring.return_value,
+            extractor._extract_admin.return_value,
+        ]
+
+    @patch("geopull.extractor.GeoJSONFeatureFile")
+    @patch("geopull.extractor.PBFFile", autospec=True)
+    def test_extract_single_pass(
+        self, pbf: PBFFile, geojson: MagicMock, extractor: GeopullExtractor
+    ):
+        extractor = GeopullExtractor(single_pass=True)
+        pbf.export_multi.return_value = [  # type: ignore[attr-defined]
+            "water",
+            "linestring",
+            "admin",
+        ]
+        results = extractor.extract(pbf)
+        pbf.export_multi.assert_called_once_with(  # type: ignore
+            [
+                extractor.water_spec,
+                extractor.linestring_spec,
+                extractor.admin_spec,
+            ],
+            overwrite=extractor.overwrite,
+        )
+        pbf.export.assert_not_called()  # type: ignore
+        assert results == [geojson.from_path.return_value] * 3
 
     @patch("geopull.extractor.GeoJSONFeatureFile", MagicMock())
     @patch("geopull.extractor.PBFFile", autospec=True)
@@ -39,11 +111,12 @@ class TestGeopullExtractor:
         extractor._extract_admin(pbf)
         pbf.export.assert_called_once_with(  # type: ignore
             attributes=["type", "id", "version", "changeset", "timestamp"],
-            include_tags=["admin_level"],
+            include_tags=["admin_level=2,4"],
             geometry_type="polygon",
             overwrite=extractor.overwrite,
             progress=extractor.progress,
             suffix="admin",
+            prefilter=True,
         )
 
     @patch("geopull.extractor.GeoJSONFeatureFile", MagicMock())
@@ -93,4 +166,30 @@ class TestGeopullExtractor:
             overwrite=extractor.overwrite,
             progress=extractor.progress,
             suffix="water",
+            prefilter=True,
         )
+
+    @pytest.mark.skipif(
+        shutil.which("osmium") is None, reason="osmium-tool is not installed"
+    )
+    def test_extract_single_pass_matches_export(
+        self, osm_pbf: PBFFile, extractor: GeopullExtractor
+    ):
+        specs = [
+            extractor.water_spec,
+            extractor.linestring_spec,
+            extractor.admin_spec,
+        ]
+        streamed = [
+            gpd.read_file(path)
+            for path in osm_pbf.export_multi(specs, overwrite=True)
+        ]
+        for spec, stream_gdf in zip(specs, streamed):
+            path = osm_pbf.export(**spec, overwrite=True, progress=False)
+            export_gdf = gpd.read_file(path).sort_values(["@type", "@id"])
+            stream_gdf = stream_gdf.sort_values(["@type", "@id"])
+            assert len(export_gdf) > 0
+            assert stream_gdf["@id"].tolist() == export_gdf["@id"].tolist()
+            assert stream_gdf.geom_type.tolist() == (
+                export_gdf.geom_type.tolist()
+            )
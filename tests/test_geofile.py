@@ -2,16 +2,28 @@
 # pylint: disable=unused-import, redefined-outer-name, protected-access
 # pylint: disable=missing-class-docstring, useless-super-delegation
 
+import json
+import os
+import tarfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from subprocess import DEVNULL, PIPE, CalledProcessError
+from unittest.mock import MagicMock, PropertyMock, patch
 
+import geopandas as gpd
+import osmium
+import pyarrow.parquet as pq
 import pytest
 from geopandas import GeoDataFrame
-from shapely.geometry import Point
+from pyogrio.raw import open_arrow
+from shapely.geometry import Point, box
 
+from geopull.directories import DataDir
 from geopull.geofile import (
+    CountryNames,
     DaylightFile,
+    FeatureFanoutHandler,
     FeatureFile,
+    FeatureStreamHandler,
     GeoFile,
     GeoJSONFeatureFile,
     ParquetFeatureFile,
@@ -25,16 +37,52 @@ def pbf_file() -> PBFFile:
     return PBFFile(country_code="USA")
 
 
+@pytest.fixture
+def osm_pbf(pbf_file: PBFFile):
+    pbf_file.local_path.unlink(missing_ok=True)
+    writer = osmium.SimpleWriter(str(pbf_file.local_path))
+    timestamp = "2020-01-01T00:00:00Z"
+    for osm_id, location in enumerate([(0, 0), (0, 1), (1, 1), (1, 0)], 1):
+        writer.add_node(
+            osmium.osm.mutable.Node(
+                id=osm_id,
+                location=location,
+                version=1,
+                changeset=1,
+                timestamp=timestamp,
+            )
+        )
+    ways = [
+        (10, [1, 2, 3, 4, 1], {"admin_level": "2"}),
+        (11, [1, 3], {"highway": "primary", "name": "main"}),
+        (12, [2, 4], {"highway": "footway"}),
+    ]
+    for osm_id, nodes, tags in ways:
+        writer.add_way(
+            osmium.osm.mutable.Way(
+                id=osm_id,
+                nodes=nodes,
+                tags=tags,
+                version=1,
+                changeset=1,
+                timestamp=timestamp,
+            )
+        )
+    writer.close()
+    yield pbf_file
+    pbf_file.local_path.unlink()
+
+
 def test_load_country_codes():
     codes = load_country_codes()
     assert isinstance(codes, dict)
     assert len(codes) == 176
     assert "USA" in codes
-    assert codes["USA"] == [
-        "usa",
-        "North America",
-        "United States of America",
-    ]
+    assert codes["USA"] == CountryNames(
+        country_name="usa",
+        continent="North America",
+        proper_name="United States of America",
+    )
 
 
 def test_geofile_abstract():
@@ -86,6 +134,14 @@ class TestPBFFile:
             == Path("data/osm/pbf/usa-latest.osm.pbf").resolve()
         )
 
+    @staticmethod
+    def test_local_path_cached():
+        pbf_file = PBFFile(country_code="USA")
+        with patch.object(Path, "resolve", autospec=True) as resolve:
+            assert pbf_file.local_path is pbf_file.local_path
+        resolve.assert_not_called()
+        assert pbf_file.local_path.is_absolute()
+
     @staticmethod
     def test_geojson_path(pbf_file: PBFFile):
         assert (
@@ -94,13 +150,23 @@ class TestPBFFile:
         )
 
     @staticmethod
-    def test_download(pbf_file: PBFFile):
-        with patch("geopull.geofile.urlretrieve") as mock_retrieve:
-            mock_retrieve.return_value = MagicMock()
-            mock_retrieve.return_value.status_code = 200
-            mock_retrieve.return_value.iter_content.return_value = [b"line1"]
-            pbf_file.download()
-            mock_retrieve.assert_called_once()
+    def test_download(tmp_path: Path):
+        pbf_file = PBFFile(country_code="USA")
+        target = tmp_path.joinpath("usa-latest.osm.pbf")
+        with (
+            patch("geopull.geofile.urlopen") as mock_open,
+            patch.object(
+                PBFFile, "local_path", new_callable=PropertyMock
+            ) as local_path,
+        ):
+            local_path.return_value = target
+            response = mock_open.return_value.__enter__.return_value
+            response.headers = {"Content-Length": "10"}
+            response.read.side_effect = [b"line1", b"line2", b""]
+            assert pbf_file.download() == target
+        mock_open.assert_called_once_with(pbf_file._download_url)
+        response.read.assert_called_with(65536)
+        assert target.read_bytes() == b"line1line2"
 
     @staticmethod
     def test_download_overwrite(pbf_file: PBFFile):
@@ -140,10 +206,78 @@ class TestPBFFile:
             pbf_file.export(
                 attributes=["one", "two", "three"],
                 include_tags=["include", "these', 'tags"],
+                prefilter=True,
+            )
+            assert mock_run.call_count == 2
+            tags_filter, export = (c.args[0] for c in mock_run.call_args_list)
+            assert tags_filter[:2] == ["osmium", "tags-filter"]
+            assert tags_filter[-3:] == [
+                str(pbf_file.local_path),
+                "include",
+                "these', 'tags",
+            ]
+            filtered = tags_filter[tags_filter.index("-o") + 1]
+            assert export[:2] == ["osmium", "export"]
+            assert export[-1] == filtered
+            assert not Path(filtered).exists()
+            pbf_file.local_path.unlink()
+
+    @staticmethod
+    def test_export_no_prefilter(pbf_file: PBFFile):
+        with patch("geopull.geofile.run") as mock_run:
+            pbf_file.local_path.touch()
+            pbf_file.export(attributes=["one"], include_tags=["highway"])
+            mock_run.assert_called_once()
+            assert mock_run.call_args.args[0][:2] == ["osmium", "export"]
+            assert mock_run.call_args.args[0][-1] == str(pbf_file.local_path)
+            pbf_file.local_path.unlink()
+
+    @staticmethod
+    def test_export_no_tags(pbf_file: PBFFile):
+        with patch("geopull.geofile.run") as mock_run:
+            pbf_file.local_path.touch()
+            pbf_file.export(
+                attributes=["one"], include_tags=[], prefilter=True
             )
             mock_run.assert_called_once()
+            assert mock_run.call_args.args[0][-1] == str(pbf_file.local_path)
             pbf_file.local_path.unlink()
 
+    @staticmethod
+    def test_tags_filter_fails(pbf_file: PBFFile):
+        pbf_file.local_path.touch()
+        files = set(pbf_file.local_path.parent.iterdir())
+        with patch(
+            "geopull.geofile.run", side_effect=CalledProcessError(1, "")
+        ):
+            with pytest.raises(CalledProcessError):
+                pbf_file._tags_filter(["highway"], progress=False)
+        assert set(pbf_file.local_path.parent.iterdir()) == files
+        pbf_file.local_path.unlink()
+
+    @staticmethod
+    def test_export_removes_config(pbf_file: PBFFile, tmp_path: Path):
+        pbf_file.local_path.touch()
+        config = tmp_path.joinpath("config.json")
+        tmpfile = open(config, "w")
+
+        def fail(args, check):
+            # osmium can only open the config once it is closed on Windows
+            assert tmpfile.closed
+            assert json.loads(config.read_text())["attributes"] == {
+                "one": True
+            }
+            raise CalledProcessError(1, args)
+
+        with (
+            patch("geopull.geofile.NamedTemporaryFile", return_value=tmpfile),
+            patch("geopull.geofile.run", side_effect=fail),
+        ):
+            with pytest.raises(CalledProcessError):
+                pbf_file.export(attributes=["one"], include_tags=[])
+        pbf_file.local_path.unlink()
+        assert not config.exists()
+
     @staticmethod
     def test_export_doesnt_exist(pbf_file: PBFFile):
         with pytest.raises(FileNotFoundError):
@@ -162,6 +296,7 @@ class TestPBFFile:
                 include_tags=["include", "these', 'tags"],
                 overwrite=True,
             )
+            PBFFile._export_config_path(pbf_file.geojson_path).unlink()
             pbf_file.geojson_path.unlink()
             pbf_file.local_path.unlink()
 
@@ -178,6 +313,26 @@ class TestPBFFile:
         pbf_file.local_path.unlink()
         pbf_file.geojson_path.unlink()
 
+    @staticmethod
+    def test_export_stale_config(pbf_file: PBFFile):
+        pbf_file.local_path.touch()
+        pbf_file.geojson_path.touch()
+        config_path = PBFFile._export_config_path(pbf_file.geojson_path)
+        config_path.write_text(
+            json.dumps(PBFFile._export_config(["one"], ["old"], None))
+        )
+        with patch("geopull.geofile.run") as mock_run:
+            pbf_file.export(attributes=["one"], include_tags=["new"])
+        assert "-O" in mock_run.call_args.args[0]
+        assert json.loads(config_path.read_text())["include_tags"] == ["new"]
+
+        with patch("geopull.geofile.run") as mock_run:
+            pbf_file.export(attributes=["one"], include_tags=["new"])
+        mock_run.assert_not_called()
+        config_path.unlink()
+        pbf_file.geojson_path.unlink()
+        pbf_file.local_path.unlink()
+
     @staticmethod
     def test_export_geometry(pbf_file: PBFFile):
         with patch("geopull.geofile.run") as mock_run:
@@ -202,6 +357,173 @@ class TestPBFFile:
             mock_run.assert_called_once()
             pbf_file.local_path.unlink()
 
+    @staticmethod
+    def test_run_osmium_quiet(caplog: pytest.LogCaptureFixture):
+        error = CalledProcessError(1, ["osmium"], stderr="bad input")
+        with patch("geopull.geofile.run", side_effect=error) as mock_run:
+            with pytest.raises(CalledProcessError):
+                PBFFile._run_osmium(["osmium", "export"], progress=False)
+        mock_run.assert_called_once_with(
+            ["osmium", "export"],
+            check=True,
+            stdout=DEVNULL,
+            stderr=PIPE,
+            text=True,
+        )
+        assert "bad input" in caplog.text
+
+    @staticmethod
+    def test_run_osmium_progress():
+        with patch("geopull.geofile.run") as mock_run:
+            PBFFile._run_osmium(["osmium", "export"], progress=True)
+        mock_run.assert_called_once_with(["osmium", "export"], check=True)
+
+    @staticmethod
+    def test_export_stream_linestring(osm_pbf: PBFFile):
+        path = osm_pbf.export_stream(
+            attributes=["type", "id", "timestamp"],
+            include_tags=["highway!=footway,steps"],
+            geometry_type="linestring",
+            suffix="linestring",
+        )
+        gdf = gpd.read_parquet(path)
+        metadata = pq.ParquetFile(path).metadata
+        path.unlink()
+        PBFFile._export_config_path(path).unlink()
+        assert path.name == "usa-latest-linestring-linestring.parquet"
+        assert metadata.row_group(0).column(0).compression == "ZSTD"
+        assert gdf.columns.tolist() == [
+            "@type",
+            "@id",
+            "@timestamp",
+            "highway",
+            "geometry",
+        ]
+        assert gdf["@id"].tolist() == [11]
+        assert gdf["@timestamp"].tolist() == ["2020-01-01T00:00:00Z"]
+        assert gdf["highway"].tolist() == ["primary"]
+        assert gdf.geom_type.tolist() == ["LineString"]
+
+    @staticmethod
+    def test_export_stream_polygon(osm_pbf: PBFFile):
+        path = osm_pbf.export_stream(
+            attributes=["type", "id"],
+            include_tags=["admin_level"],
+            geometry_type="polygon",
+            batch_size=1,
+        )
+        gdf = gpd.read_parquet(path)
+        path.unlink()
+        PBFFile._export_config_path(path).unlink()
+        assert gdf.crs == 4326
+        assert gdf["@type"].tolist() == ["way"]
+        assert gdf["@id"].tolist() == [10]
+        assert gdf["admin_level"].tolist() == ["2"]
+        assert gdf.geometry.iloc[0].area == 1.0
+
+    @staticmethod
+    def test_export_stream_skip_overwrite(osm_pbf: PBFFile):
+        target = osm_pbf.datadir.osm_parquet_dir.joinpath("usa-latest.parquet")
+        target.touch()
+        result = osm_pbf.export_stream(attributes=[], include_tags=["name"])
+        assert result == target
+        assert target.stat().st_size == 0
+        target.unlink()
+
+    @staticmethod
+    def test_export_stream_doesnt_exist(pbf_file: PBFFile):
+        with pytest.raises(FileNotFoundError):
+            pbf_file.export_stream(attributes=[], include_tags=["name"])
+
+    @staticmethod
+    def test_export_multi(osm_pbf: PBFFile):
+        paths = osm_pbf.export_multi(
+            [
+                {
+                    "attributes": ["type", "id"],
+                    "include_tags": ["highway!=footway,steps"],
+                    "geometry_type": "linestring",
+                    "suffix": "linestring",
+                },
+                {
+                    "attributes": ["type", "id"],
+                    "include_tags": ["admin_level"],
+                    "geometry_type": "polygon",
+                    "suffix": "admin",
+                },
+            ]
+        )
+        lines, admin = (gpd.read_file(path) for path in paths)
+        for path in paths:
+            path.unlink()
+            PBFFile._export_config_path(path).unlink()
+        assert [path.name for path in paths] == [
+            "usa-latest-linestring-linestring.geojson",
+            "usa-latest-polygon-admin.geojson",
+        ]
+        assert lines["@id"].tolist() == [11]
+        assert lines["highway"].tolist() == ["primary"]
+        assert lines.geom_type.tolist() == ["LineString"]
+        assert admin["@type"].tolist() == ["way"]
+        assert admin["admin_level"].tolist() == ["2"]
+        assert admin.geometry.iloc[0].area == 1.0
+
+    @staticmethod
+    def test_export_multi_skip_overwrite(osm_pbf: PBFFile):
+        target = osm_pbf.datadir.osm_geojson_dir.joinpath(
+            "usa-latest-polygon-admin.geojson"
+        )
+        target.touch()
+        with patch.object(FeatureFanoutHandler, "apply_file") as apply_file:
+            result = osm_pbf.export_multi(
+                [
+                    {
+                        "attributes": [],
+                        "include_tags": ["admin_level"],
+                        "geometry_type": "polygon",
+                        "suffix": "admin",
+                    }
+                ]
+            )
+        apply_file.assert_not_called()
+        assert result == [target]
+        assert target.stat().st_size == 0
+        target.unlink()
+
+    @staticmethod
+    def test_export_multi_doesnt_exist(pbf_file: PBFFile):
+        with pytest.raises(FileNotFoundError):
+            pbf_file.export_multi([])
+
+    @staticmethod
+    def test_fanout_handler_callbacks(tmp_path: Path):
+        lines = FeatureStreamHandler(
+            tmp_path.joinpath("lines.parquet"),
+            attributes=[],
+            include_tags=["highway"],
+            geometry_type="linestring",
+        )
+        points = FeatureStreamHandler(
+            tmp_path.joinpath("points.parquet"),
+            attributes=[],
+            include_tags=["highway"],
+            geometry_type="point",
+        )
+        handler = FeatureFanoutHandler([lines, points])
+        handler.close()
+        assert hasattr(handler, "node")
+        assert hasattr(handler, "way")
+        assert not hasattr(handler, "area")
+
+    @staticmethod
+    def test_stream_handler_bad_attributes(tmp_path: Path):
+        with pytest.raises(ValueError):
+            FeatureStreamHandler(
+                tmp_path.joinpath("out.parquet"),
+                attributes=["bad"],
+                include_tags=[],
+            )
+
     @staticmethod
     def test_remove_file(pbf_file: PBFFile):
         pbf_file.local_path.touch()
@@ -259,14 +581,94 @@ class TestParquetFeatureFile:
         ).set_crs("EPSG:4326")
         mock_read.return_value = gdf
         assert parquet_file.read_file().equals(gdf)
-        mock_read.assert_called_once_with(parquet_file.local_path)
+        mock_read.assert_called_once_with(
+            parquet_file.local_path, columns=None, bbox=None
+        )
+
+    @patch("geopandas.read_parquet")
+    def test_read_file_columns(
+        self, mock_read: MagicMock, parquet_file: ParquetFeatureFile
+    ):
+        mock_read.return_value = GeoDataFrame(geometry=[Point(0, 0)], crs=4326)
+        parquet_file.read_file(columns=["geometry"])
+        mock_read.assert_called_once_with(
+            parquet_file.local_path, columns=["geometry"], bbox=None
+        )
+
+    def test_read_file_no_geometry(self, tmp_path: Path):
+        gdf = GeoDataFrame(
+            geometry=[Point(0, 0), Point(1, 1)], data={"one": [1, 2]}, crs=4326
+        )
+        parquet_file = ParquetFeatureFile("USA", "admin")
+        path = tmp_path.joinpath("features.parquet")
+        gdf.to_parquet(path, write_covering_bbox=True)
+        with patch.object(
+            ParquetFeatureFile, "local_path", new_callable=PropertyMock
+        ) as local_path:
+            local_path.return_value = path
+            result = parquet_file.read_file(geometry=False)
+        assert not isinstance(result, GeoDataFrame)
+        assert list(result.columns) == ["one"]
+
+    @patch("geopandas.read_parquet")
+    def test_read_file_crs84(
+        self, mock_read: MagicMock, parquet_file: ParquetFeatureFile
+    ):
+        gdf = GeoDataFrame(geometry=[Point(0, 1)], crs="OGC:CRS84")
+        mock_read.return_value = gdf
+        with patch.object(GeoDataFrame, "to_crs") as to_crs:
+            result = parquet_file.read_file()
+        to_crs.assert_not_called()
+        assert result.crs == 4326
+        assert result.geometry.iloc[0].equals(Point(0, 1))
 
     @patch("geopandas.GeoDataFrame")
     def test_write_file(
         self, mock_gdf: MagicMock, parquet_file: ParquetFeatureFile
     ):
         parquet_file.write_file(mock_gdf)
-        mock_gdf.to_parquet.assert_called_once_with(parquet_file.local_path)
+        mock_gdf.to_parquet.assert_called_once_with(
+            parquet_file.local_path,
+            compression="zstd",
+            write_covering_bbox=True,
+            row_group_size=50_000,
+        )
+
+    def test_read_dataset(self, tmp_path: Path):
+        files = []
+        for code, x in (("USA", 0), ("MEX", 10)):
+            gdf = GeoDataFrame(
+                data={"one": [x, x + 1]},
+                geometry=[Point(x, 0), Point(x + 1, 0)],
+                crs=4326,
+            )
+            path = tmp_path.joinpath(f"{code}.parquet")
+            gdf.to_parquet(path, write_covering_bbox=True)
+            parquet_file = ParquetFeatureFile(code, "admin")
+            parquet_file.local_path = path
+            files.append(parquet_file)
+
+        result = ParquetFeatureFile.read_dataset(
+            files, columns=["one", "geometry"], filters=[("one", ">", 0)]
+        )
+        assert list(result["one"]) == [1, 10, 11]
+        assert result.crs == 4326
+
+        result = ParquetFeatureFile.read_dataset(files, bbox=(9, -1, 10, 1))
+        assert list(result.geometry) == [Point(10, 0)]
+
+    def test_read_file_bbox(self, tmp_path: Path):
+        gdf = GeoDataFrame(geometry=[Point(0, 0), Point(10, 10)], crs=4326)
+        parquet_file = ParquetFeatureFile("USA", "admin")
+        path = tmp_path.joinpath("features.parquet")
+        with patch.object(
+            ParquetFeatureFile, "local_path", new_callable=PropertyMock
+        ) as local_path:
+            local_path.return_value = path
+            parquet_file.write_file(gdf)
+            result = parquet_file.read_file(bbox=(-1, -1, 1, 1))
+        assert "bbox" in pq.read_schema(path).names
+        assert list(result.geometry) == [Point(0, 0)]
 
 
 class TestGeoJSONFeatures:
@@ -290,7 +692,9 @@ class TestGeoJSONFeatures:
     ):
         mock_read.return_value = "gdf"
         assert geojson.read_file() == "gdf"
-        mock_read.assert_called_once_with(geojson.local_path)
+        mock_read.assert_called_once_with(
+            geojson.local_path, engine="pyogrio", use_arrow=True
+        )
 
     @patch("geopandas.GeoDataFrame")
     def test_write_file(
@@ -298,8 +702,28 @@ class TestGeoJSONFeatures:
     ):
         geojson.write_file(mock_gdf)
         mock_gdf.to_file.assert_called_once_with(
-            geojson.local_path, driver="GeoJSON"
+            geojson.local_path, driver="GeoJSON", engine="pyogrio"
+        )
+
+    def test_to_parquet(self, geojson: GeoJSONFeatureFile, tmp_path: Path):
+        gdf = GeoDataFrame(
+            {"@id": [1, 2, 3], "highway": ["primary", None, "service"]},
+            geometry=[Point(0, 0), Point(1, 1), Point(2, 2)],
+            crs=4326,
         )
+        gdf.to_file(geojson.local_path, driver="GeoJSON")
+        path = geojson.to_parquet(tmp_path.joinpath("out.parquet"), 2)
+        metadata = pq.ParquetFile(path).metadata
+        geo = json.loads(metadata.metadata[b"geo"])
+        result = gpd.read_parquet(path)
+        subset = gpd.read_parquet(path, bbox=(1.5, 1.5, 3, 3))
+        expected = geojson.read_file()
+        geojson.local_path.unlink()
+        assert metadata.num_row_groups == 2
+        assert "covering" in geo["columns"]["geometry"]
+        assert result.crs == 4326
+        assert result.equals(expected)
+        assert subset["@id"].tolist() == [3]
 
     def test_from_path(self):
         path = Path("data/osm/geojson/usa-latest-polygon-admin.geojson")
@@ -331,18 +755,51 @@ class TestDaylightFile:
         daylight.download()
         mock_download.assert_called_once_with(overwrite=False)
 
-    @pytest.mark.parametrize("bbox", [None, (0, 0, 1, 1)])
-    @patch("geopandas.read_file")
-    def test_get_coastline(
-        self, mock_read: MagicMock, bbox: tuple | None, daylight: DaylightFile
-    ):
-        daylight.get_coastline(bbox=bbox)
-
-        if bbox is None:
-            mock_read.assert_called_once_with(
-                f"tar://{daylight.local_path}!water_polygons.shp"
-            )
-        else:
-            mock_read.assert_called_once_with(
-                f"tar://{daylight.local_path}!water_polygons.shp", bbox=bbox
-            )
+    @pytest.fixture
+    def coastline(self, tmp_path: Path) -> DaylightFile:
+        daylight = DaylightFile(datadir=DataDir(str(tmp_path)))
+        shapes = tmp_path.joinpath("shapes")
+        shapes.mkdir()
+        GeoDataFrame(
+            data={"x": [0, 5]},
+            geometry=[box(0, 0, 1, 1), box(5, 5, 6, 6)],
+            crs=4326,
+        ).to_file(shapes.joinpath("water_polygons.shp"))
+        with tarfile.open(daylight.local_path, "w:gz") as tar:
+            for path in shapes.iterdir():
+                tar.add(path, arcname=path.name)
+        return daylight
+
+    @pytest.mark.parametrize("bbox", [None, (-1, -1, 2, 2)])
+    def test_get_coastline(self, bbox: tuple | None, coastline: DaylightFile):
+        result = coastline.get_coastline(bbox=bbox)
+        assert list(result["x"]) == ([0, 5] if bbox is None else [0])
+        assert result.crs == 4326
+        assert "bbox" in pq.read_schema(coastline.parquet_path).names
+
+    def test_get_coastline_fails(self, coastline: DaylightFile):
+        with patch("shapely.from_wkb", side_effect=ValueError("bad wkb")):
+            with pytest.raises(ValueError):
+                coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        assert not coastline.parquet_path.exists()
+        assert not list(coastline.parquet_path.parent.glob("*.tmp"))
+
+    def test_get_coastline_without_tar(self, coastline: DaylightFile):
+        coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        coastline.local_path.unlink()
+        result = coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        assert list(result["x"]) == [0]
+
+    def test_get_coastline_cached(self, coastline: DaylightFile):
+        coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        with patch("pyogrio.raw.open_arrow") as mock_open:
+            coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        mock_open.assert_not_called()
+
+        # a new download makes the copy stale
+        mtime = coastline.parquet_path.stat().st_mtime + 10
+        os.utime(coastline.local_path, (mtime, mtime))
+        with patch("pyogrio.raw.open_arrow", wraps=open_arrow) as mock_open:
+            coastline.get_coastline(bbox=(-1, -1, 2, 2))
+        mock_open.assert_called_once()
+        assert not list(coastline.parquet_path.parent.glob("*.tmp"))
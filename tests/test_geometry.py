@@ -0,0 +1,14 @@
+# pylint: disable=missing-function-docstring
+
+import pytest
+from geopandas import GeoDataFrame
+from shapely.geometry import box
+
+from geopull.geometry import mercator_area
+
+
+def test_mercator_area():
+    gdf = GeoDataFrame(geometry=[box(0, 0, 1, 1), box(10, 40, 12, 45)])
+    gdf = gdf.set_crs(4326)
+    areas = mercator_area(gdf.geometry.values)
+    assert areas == pytest.approx(gdf.to_crs(3395).area.to_numpy())
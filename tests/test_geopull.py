@@ -10,6 +10,8 @@ Created on 2022-12-17 07:13:45-05:00
 """
 # pylint: disable=import-outside-toplevel,missing-function-docstring
 # pylint: disable=unused-import
+import subprocess
+import sys
 
 
 def test_import_geopull():
@@ -46,3 +48,22 @@ def test_import_normalizer():
 
 def test_import_blocker():
     import geopull.blocker  # noqa: F401
+
+
+def test_import_geometry():
+    import geopull.geometry  # noqa: F401
+
+
+def test_cli_download_skips_geopandas():
+    script = """
+import sys
+from unittest.mock import patch
+
+from geopull.__main__ import GeoPullCLI
+
+sys.argv = ["geopull", "download", "countries", "USA"]
+with patch("geopull.orchestrator.Orchestrator.download"):
+    GeoPullCLI().main()
+assert "geopandas" not in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", script], check=True)
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, patch
 
 import geopandas as gpd
 import pytest
-from shapely.geometry import Polygon
+from shapely.geometry import Polygon, box
 
 from geopull.geofile import DaylightFile, GeoJSONFeatureFile
 from geopull.normalizer import GeopullNormalizer, Normalizer
@@ -56,6 +56,7 @@ class TestGeopullNormalizer:
         normalizer.normalize(admin=geojson, water=geojson, linestring=geojson)
         normalizer._normalize_admin.assert_called_once_with(geojson)
         normalizer._normalize_water.assert_called_once()
+        geojson.to_parquet.assert_called_once()
 
     @patch("geopull.normalizer.ParquetFeatureFile", MagicMock())
     @patch.object(GeopullNormalizer, "_normalize_coastline", MagicMock())
@@ -99,24 +100,43 @@ class TestGeopullNormalizer:
         assert geojson.gdf["admin_level"].min() == 2
 
     @pytest.mark.parametrize("intersect", (0, 2))
-    @patch.object(GeopullNormalizer, "_get_coastlines", MagicMock())
-    @patch("geopandas.sjoin")
     @patch("geopandas.overlay")
     def test_normalize_coastline(
-        self, mock_overlay, mock_sjoin, intersect, normalizer, geojson, geodata
+        self, mock_overlay, intersect, normalizer, geojson, geodata
     ):
-        gdf = gpd.GeoDataFrame({"admin_level": [2, 2, 2]})
+        gdf = geodata.iloc[:1].copy()
         geojson.gdf = gdf
-        mock_sjoin.return_value = ["record"] * intersect
+        offsets = [0.5] * intersect + [5, 6]
+        dldf = gpd.GeoDataFrame(
+            geometry=[box(x, x, x + 1, x + 1) for x in offsets], crs=4326
+        )
         mock_overlay.return_value = geodata
-        normalizer._normalize_coastline(geojson)
+        with patch.object(
+            GeopullNormalizer, "_get_coastlines", return_value=dldf
+        ):
+            normalizer._normalize_coastline(geojson)
 
         if intersect == 0:
+            mock_overlay.assert_not_called()
             assert geojson.gdf.equals(gdf)
         else:
+            assert mock_overlay.call_args.kwargs["df2"].equals(
+                dldf.iloc[:intersect]
+            )
             geojson.gdf["geometry"] = geojson.gdf.make_valid()
             assert geojson.gdf.equals(geodata)
 
+    def test_get_coastlines_uses_total_bounds(
+        self, normalizer: GeopullNormalizer, geojson, geodata
+    ):
+        geojson.gdf = geodata
+        dl = MagicMock(spec=DaylightFile)
+        with patch.object(gpd.GeoDataFrame, "dissolve") as dissolve:
+            result = normalizer._get_coastlines(geojson, dl)
+        dissolve.assert_not_called()
+        dl.get_coastline.assert_called_once_with(bbox=(0.0, 0.0, 2.0, 2.0))
+        assert result == dl.get_coastline.return_value
+
     @patch("geopandas.overlay")
     def test_normalize_water(
         self,
@@ -2,12 +2,17 @@
 # pylint: disable=unused-import, protected-access,missing-class-docstring
 # pylint: disable=redefined-outer-name
 
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from geopull.geofile import PBFFile
-from geopull.orchestrator import Orchestrator
+from geopull.orchestrator import (
+    Orchestrator,
+    _normalize_country,
+    _share_osmium_threads,
+)
 
 
 class TestOrchestrator:
@@ -28,21 +33,118 @@ class TestOrchestrator:
         for pbf in orchestrator.pbfs:
             pbf.download.assert_called_once()  # type: ignore
 
+    @patch.object(PBFFile, "export", MagicMock(return_value="path"))
+    def test_export(self, orchestrator: Orchestrator):
+        result = orchestrator.export(attributes=["id"], include_tags=["tag"])
+        assert result == ["path"]
+        PBFFile.export.assert_called_once_with(  # type: ignore
+            attributes=["id"],
+            include_tags=["tag"],
+            geometry_type=None,
+            overwrite=False,
+            progress=True,
+        )
+
+    @patch.object(PBFFile, "export_stream", MagicMock(return_value="path"))
+    def test_export_stream(self, orchestrator: Orchestrator):
+        result = orchestrator.export(
+            attributes=["id"], include_tags=["tag"], stream=True
+        )
+        assert result == ["path"]
+        PBFFile.export_stream.assert_called_once_with(  # type: ignore
+            attributes=["id"],
+            include_tags=["tag"],
+            geometry_type=None,
+            overwrite=False,
+        )
+
+    @patch("geopull.orchestrator.ProcessPoolExecutor")
+    def test_export_stream_many(self, mock_pool: MagicMock):
+        orchestrator = Orchestrator(["usa", "mex", "can"])
+        executor = mock_pool.return_value.__enter__.return_value
+        executor.map.return_value = iter(["usa", "mex", "can"])
+        with patch("os.cpu_count", MagicMock(return_value=4)):
+            result = orchestrator.export(
+                attributes=["id"], include_tags=["tag"], stream=True
+            )
+        assert result == ["usa", "mex", "can"]
+        mock_pool.assert_called_once_with(
+            max_workers=3,
+            initializer=_share_osmium_threads,
+            initargs=(1,),
+        )
+        exporter, pbfs = executor.map.call_args.args
+        assert pbfs == orchestrator.pbfs
+        pbf = MagicMock()
+        exporter(pbf)
+        pbf.export_stream.assert_called_once_with(
+            attributes=["id"],
+            include_tags=["tag"],
+            geometry_type=None,
+            overwrite=False,
+        )
+
     @patch("geopull.extractor.Extractor")
     def test_extract(self, mock_exc: MagicMock, orchestrator: Orchestrator):
         orchestrator.extract(mock_exc)
         for pbf in orchestrator.pbfs:
             mock_exc.extract.assert_called_once_with(pbf)
 
+    @patch("geopull.orchestrator.ProcessPoolExecutor")
+    def test_extract_many(self, mock_pool: MagicMock):
+        orchestrator = Orchestrator(["usa", "mex", "can"])
+        extractor = MagicMock()
+        with patch("os.cpu_count", MagicMock(return_value=4)):
+            orchestrator.extract(extractor, max_workers=2)
+        mock_pool.assert_called_once_with(
+            max_workers=2,
+            initializer=_share_osmium_threads,
+            initargs=(2,),
+        )
+        executor = mock_pool.return_value.__enter__.return_value
+        executor.map.assert_called_once_with(
+            extractor.extract, orchestrator.pbfs
+        )
+
+    def test_share_osmium_threads(self):
+        with patch.dict("os.environ"):
+            _share_osmium_threads(3)
+            assert os.environ["OSMIUM_POOL_THREADS"] == "3"
+
     @patch("geopull.normalizer.Normalizer")
     def test_normalize(self, mock_norm: MagicMock, orchestrator: Orchestrator):
         orchestrator.normalize(mock_norm)
         mock_norm.normalize.assert_called_once()
 
-    @patch("geopull.orchestrator.GeoPullBlocker")
+    @patch("geopull.orchestrator.ProcessPoolExecutor")
+    def test_normalize_many(self, mock_pool: MagicMock):
+        orchestrator = Orchestrator(["usa", "mex", "can"])
+        normalizer = MagicMock()
+        orchestrator.normalize(normalizer, max_workers=2)
+        mock_pool.assert_called_once_with(max_workers=2)
+        executor = mock_pool.return_value.__enter__.return_value
+        func, countries = executor.map.call_args.args
+        assert countries == ["usa", "mex", "can"]
+        assert func.func is _normalize_country
+        assert func.args == (normalizer,)
+
+    def test_normalize_country(self):
+        normalizer = MagicMock()
+        _normalize_country(normalizer, "USA")
+        kwargs = normalizer.normalize.call_args.kwargs
+        assert kwargs["admin"].suffix == "admin"
+        assert kwargs["water"].suffix == "water"
+        assert kwargs["linestring"].geometry_type == "linestring"
+
+    @patch("geopull.blocker.GeoPullBlocker")
     def test_block(self, mock_block: MagicMock, orchestrator: Orchestrator):
         orchestrator.block()
         mock_block.return_value.build_blocks.assert_called_once()
+        blocks = mock_block.return_value.build_blocks.return_value
+        blocks.to_parquet.assert_called_once_with(
+            orchestrator.datadir.blocks_dir / "usa.parquet",
+            compression="zstd",
+        )
 
     @pytest.mark.parametrize("ncpu", [None, 4])
     @patch("geopull.orchestrator.Pool")